@@ -0,0 +1,192 @@
+"""
+Compares CPU inference profiles for the local pipeline, reporting generated tokens/s and peak RSS.
+
+Each profile runs in its own process, since thread settings and peak RSS are per process.
+
+Usage:
+    python benchmarks/cpu_inference.py --stage structured
+    python benchmarks/cpu_inference.py --stage multimodal --image card.HEIC --profiles baseline int8
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+MULTIMODAL_MODEL = "google/gemma-3-4b-it"
+STRUCTURED_MODEL = "HuggingFaceTB/SmolLM2-1.7B-Instruct"
+
+# Stands in for the multimodal model's output when benchmarking the structured stage alone
+SAMPLE_EXTRACTED_TEXT = """
+Title: Creamy Dijon Chicken with Roasted Potatoes and Green Beans
+Prep time: 10 minutes
+Cook time: 35 minutes
+Calories: 720
+Ingredients:
+- Chicken breasts, 10 oz
+- Yukon gold potatoes, 12 oz
+- Green beans, 6 oz
+- Shallot, 1
+- Dijon mustard, 1 tsp
+- Sour cream, 4 tbsp
+- Chicken stock concentrate, 1
+- Thyme, 1/4 oz
+"""
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_structured(profile: Any, runs: int) -> Dict[str, float]:
+    from hellofresh_extractor.llm.output_schemas import ExtractedMeal
+    from hellofresh_extractor.llm.prompts import (
+        multimodal_user_query,
+        structured_system_prompt,
+    )
+    from hellofresh_extractor.llm.StructuredOutputModel import StructuredOutputModel
+
+    t0 = time.time()
+    structured_model = profile.outlines_model(STRUCTURED_MODEL)
+    caller = StructuredOutputModel(model=structured_model, outputmodel=ExtractedMeal)
+    load_seconds = time.time() - t0
+
+    def invoke() -> str:
+        result = caller.invoke(
+            system_message=structured_system_prompt,
+            user_query=multimodal_user_query,
+            text_to_extract=SAMPLE_EXTRACTED_TEXT,
+        )
+        return result.model_dump_json()
+
+    tokenizer = structured_model.tokenizer.tokenizer
+    return time_runs(invoke, tokenizer, runs, load_seconds)
+
+
+def run_multimodal(profile: Any, runs: int, image_path: str) -> Dict[str, float]:
+    from PIL import Image
+    from pillow_heif import register_heif_opener
+    from hellofresh_extractor.llm.MultiModalModel import MultiModalModel
+    from hellofresh_extractor.llm.prompts import (
+        multimodal_system_prompt,
+        multimodal_user_query,
+    )
+
+    register_heif_opener()
+    image = Image.open(image_path)
+
+    t0 = time.time()
+    multimodal_pipe = profile.multimodal_pipeline(
+        MULTIMODAL_MODEL, token=os.environ.get("HF_TOKEN")
+    )
+    caller = MultiModalModel(model_pipe=multimodal_pipe)
+    load_seconds = time.time() - t0
+
+    def invoke() -> str:
+        result = caller.invoke(
+            system_message=multimodal_system_prompt,
+            user_messages=[
+                {"type": "image", "image": image},
+                {"type": "text", "text": multimodal_user_query},
+            ],
+        )
+        return result[0]["generated_text"]
+
+    return time_runs(invoke, multimodal_pipe.tokenizer, runs, load_seconds)
+
+
+def time_runs(invoke: Any, tokenizer: Any, runs: int, load_seconds: float) -> Dict[str, float]:
+    # The first call pays for compilation and lazy initialization, so it is not timed
+    invoke()
+
+    n_tokens = 0
+    t0 = time.time()
+    for _ in range(runs):
+        n_tokens += len(tokenizer(invoke(), add_special_tokens=False)["input_ids"])
+    elapsed = time.time() - t0
+
+    return {
+        "load_seconds": load_seconds,
+        "seconds_per_call": elapsed / runs,
+        "tokens_per_second": n_tokens / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_child(args: argparse.Namespace) -> None:
+    from hellofresh_extractor.llm.CPUProfile import CPU_PROFILES
+
+    profile = CPU_PROFILES[args.child]
+    if args.stage == "structured":
+        result = run_structured(profile, args.runs)
+    else:
+        result = run_multimodal(profile, args.runs, args.image)
+    print(json.dumps({"profile": profile.name, **result}))
+
+
+def run_profile(profile_name: str, args: argparse.Namespace) -> Optional[Dict[str, Any]]:
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--child",
+        profile_name,
+        "--stage",
+        args.stage,
+        "--runs",
+        str(args.runs),
+    ]
+    if args.image:
+        command += ["--image", args.image]
+
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Error running profile {profile_name}: {result.stderr.strip()[-2000:]}")
+        return None
+    # The child may print progress, the result is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(args: argparse.Namespace) -> None:
+    from hellofresh_extractor.llm.CPUProfile import CPU_PROFILES
+
+    if args.stage == "multimodal" and not args.image:
+        raise ValueError("--image is required for the multimodal stage")
+
+    rows: List[Dict[str, Any]] = []
+    for profile_name in args.profiles or list(CPU_PROFILES):
+        print(f"Running profile {profile_name}")
+        row = run_profile(profile_name, args)
+        if row is not None:
+            rows.append(row)
+
+    print(
+        f"{'profile':<16}{'load s':>10}{'s/call':>10}{'tokens/s':>12}{'peak RSS MB':>14}"
+    )
+    for row in sorted(rows, key=lambda row: -row["tokens_per_second"]):
+        print(
+            f"{row['profile']:<16}{row['load_seconds']:>10.1f}{row['seconds_per_call']:>10.1f}"
+            f"{row['tokens_per_second']:>12.2f}{row['peak_rss_mb']:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stage", choices=["structured", "multimodal"], default="structured")
+    parser.add_argument("--profiles", nargs="*", help="Profiles to run. Defaults to all.")
+    parser.add_argument("--runs", type=int, default=3, help="Timed calls per profile.")
+    parser.add_argument("--image", help="Recipe card image, for the multimodal stage.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+    else:
+        main(args)
@@ -0,0 +1,64 @@
+"""
+Measures how long each hellofresh_extractor module takes to import in a fresh interpreter.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py hellofresh_extractor.llm.StructuredGeminiCaller
+"""
+
+import os
+import subprocess
+import sys
+from typing import List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "hellofresh_extractor.gsuite.drive.GoogleDriveHelper",
+    "hellofresh_extractor.gsuite.drive.DriveFolderSync",
+    "hellofresh_extractor.llm.StructuredGeminiCaller",
+    "hellofresh_extractor.llm.StructuredClaudeCaller",
+    "hellofresh_extractor.llm.StructuredOutputModel",
+    "hellofresh_extractor.llm.GeminiEmbeddings",
+    "hellofresh_extractor.llm.utils",
+    "hellofresh_extractor.pipeline.extraction",
+]
+
+
+def import_time_ms(module: str) -> Optional[float]:
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module (str): The dotted module name.
+
+    Returns:
+        Optional[float]: The cumulative import time in milliseconds, or None if the import failed.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(f"Error importing {module}: {result.stderr.strip().splitlines()[-1]}")
+        return None
+
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    return None
+
+
+def main(modules: List[str]) -> None:
+    for module in modules:
+        elapsed = import_time_ms(module)
+        if elapsed is not None:
+            print(f"{elapsed:10.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or DEFAULT_MODULES)
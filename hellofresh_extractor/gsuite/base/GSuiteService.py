@@ -1,6 +1,6 @@
-from google.oauth2 import service_account
 from abc import ABC, abstractmethod
 from hellofresh_extractor.gsuite.base.config import CREDENTIALS
+from hellofresh_extractor.gsuite.base.ServiceRegistry import ServiceRegistry
 from typing import Any
 
 
@@ -51,13 +51,10 @@ class GSuiteService(ABC):
         """
         Builds the G Suite service using the provided credentials.
 
+        Credentials and service objects are cached process-wide by the ServiceRegistry, so
+        repeated calls from the same thread return the same service object.
+
         Returns:
             Any: The constructed service object.
         """
-        # Get credentials into the desired format
-        creds = service_account.Credentials.from_service_account_file(
-            self.credential_path, scopes=self.SCOPES
-        )
-
-        service = self.get_service(creds)
-        return service
+        return ServiceRegistry.get_service(self)
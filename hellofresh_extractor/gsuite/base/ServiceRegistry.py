@@ -0,0 +1,78 @@
+from typing import Any, Dict, Tuple
+import threading
+
+
+class ServiceRegistry:
+    """
+    A process-wide registry of G Suite credentials and service objects.
+
+    Credentials are loaded from the service account file once per (file, scopes) pair and
+    shared by every service. Service objects wrap an httplib2 connection, which is not
+    thread-safe, so each thread gets its own service object, built the first time that
+    thread asks for it. The shared credentials refresh their access token automatically
+    whenever a request finds it expired.
+    """
+
+    _credentials: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    @classmethod
+    def get_credentials(cls, credential_path: str, scopes: list[str]) -> Any:
+        """
+        Returns the shared credentials for a service account file and scopes.
+
+        Args:
+            credential_path (str): The path to the service account file.
+            scopes (list[str]): The scopes required.
+
+        Returns:
+            Any: The service account credentials.
+        """
+        key = (credential_path, tuple(sorted(scopes)))
+        with cls._lock:
+            if key not in cls._credentials:
+                from google.oauth2 import service_account
+
+                cls._credentials[key] = (
+                    service_account.Credentials.from_service_account_file(
+                        credential_path, scopes=scopes
+                    )
+                )
+            return cls._credentials[key]
+
+    @classmethod
+    def get_service(cls, gsuite_service: Any) -> Any:
+        """
+        Returns the calling thread's service object for a GSuiteService, building it on first use.
+
+        Args:
+            gsuite_service (GSuiteService): Describes the service, its scopes and how to build it.
+
+        Returns:
+            Any: The service object.
+        """
+        key = (
+            type(gsuite_service).__name__,
+            gsuite_service.credential_path,
+            tuple(sorted(gsuite_service.SCOPES)),
+        )
+        services = getattr(cls._local, "services", None)
+        if services is None:
+            services = cls._local.services = {}
+
+        if key not in services:
+            creds = cls.get_credentials(
+                gsuite_service.credential_path, gsuite_service.SCOPES
+            )
+            services[key] = gsuite_service.get_service(creds)
+        return services[key]
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Forgets all credentials, and the calling thread's service objects.
+        """
+        with cls._lock:
+            cls._credentials = {}
+        cls._local.services = {}
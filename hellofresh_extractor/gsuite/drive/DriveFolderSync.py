@@ -0,0 +1,261 @@
+from hellofresh_extractor.gsuite.drive.GoogleDriveHelper import (
+    ALL_DRIVES_ARGS,
+    GoogleDriveHelper,
+)
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+import json
+import os
+
+FILE_FIELDS = "id, name, md5Checksum, size, modifiedTime"
+
+
+class DriveFolderSync:
+    """
+    Incrementally mirrors the image files of a Google Drive folder into a local directory.
+
+    A JSON manifest in the download directory records the id, md5Checksum, size and
+    modifiedTime of every synced file, so later runs only download new or changed files.
+    Each sync returns a diff of what was added, changed and removed, which downstream
+    extraction can use to process only new cards.
+
+    Example usage:
+    sync = DriveFolderSync(drive_helper, folder_id=image_folder_id, download_path=images_path)
+    diff = sync.sync(use_changes=True)
+    new_images = [file["path"] for file in diff["added"] + diff["changed"]]
+
+    Attributes:
+        drive_helper (GoogleDriveHelper): The helper used to talk to Google Drive.
+        folder_id (str): The ID of the Google Drive folder to mirror.
+        download_path (str): The local directory files are downloaded to.
+        extension (str): The image file extension to match.
+        manifest_path (str): The location of the JSON manifest.
+    """
+
+    def __init__(
+        self,
+        drive_helper: GoogleDriveHelper,
+        folder_id: str,
+        download_path: str = "./downloads",
+        extension: str = "HEIC",
+        manifest_path: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the sync and loads the manifest from any previous run.
+
+        Args:
+            drive_helper (GoogleDriveHelper): The helper used to talk to Google Drive.
+            folder_id (str): The ID of the Google Drive folder to mirror.
+            download_path (str, optional): The local directory to download to. Defaults to "./downloads".
+            extension (str, optional): The image file extension to match. Defaults to "HEIC".
+            manifest_path (Optional[str]): The location of the manifest. Defaults to
+                .drive_manifest.json inside download_path.
+        """
+        self.drive_helper = drive_helper
+        self.folder_id = folder_id
+        self.download_path = download_path
+        self.extension = extension
+        self.manifest_path = manifest_path or os.path.join(
+            download_path, ".drive_manifest.json"
+        )
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("folder_id") == self.folder_id:
+                if "drive_id" not in manifest:
+                    # Older manifests hold a My Drive token, which never reports shared drive changes
+                    manifest["start_page_token"] = None
+                return manifest
+            print(
+                f"Manifest {self.manifest_path} belongs to another folder, starting a full sync"
+            )
+        return {"folder_id": self.folder_id, "start_page_token": None, "files": {}}
+
+    def _save_manifest(self) -> None:
+        # Write to a temporary file first so an interrupted run never leaves a corrupt manifest
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def _matches_extension(self, file_name: str) -> bool:
+        return file_name.lower().endswith(f".{self.extension.lower()}")
+
+    def _drive_id(self) -> Optional[str]:
+        """
+        Returns the ID of the shared drive holding the folder, or None for a My Drive folder.
+        Looked up once and stored in the manifest.
+        """
+        if "drive_id" not in self.manifest:
+            folder = (
+                self.drive_helper.drive_service.files()
+                .get(fileId=self.folder_id, fields="driveId", supportsAllDrives=True)
+                .execute()
+            )
+            self.manifest["drive_id"] = folder.get("driveId")
+        return self.manifest["drive_id"]
+
+    def _changes_args(self) -> Dict[str, Any]:
+        """
+        Returns the shared drive arguments for changes().list, matching the folder listing.
+        """
+        args = dict(ALL_DRIVES_ARGS)
+        drive_id = self._drive_id()
+        if drive_id:
+            # Changes in a shared drive are only reported through that drive's own change log
+            args["driveId"] = drive_id
+        return args
+
+    def _is_changed(self, file_info: Dict[str, Any]) -> bool:
+        known = self.manifest["files"][file_info["id"]]
+        return (
+            known.get("md5Checksum") != file_info.get("md5Checksum")
+            or known.get("modifiedTime") != file_info.get("modifiedTime")
+            or not os.path.exists(known.get("path", ""))
+        )
+
+    def _list_changes(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Follows the Drive Changes API from the stored start page token.
+
+        Returns:
+            Optional[Dict[str, List[Dict[str, Any]]]]: The files to download and the files removed
+                from the folder, or None if there is no start page token yet.
+        """
+        page_token = self.manifest.get("start_page_token")
+        if not page_token:
+            return None
+
+        to_download: Dict[str, Dict[str, Any]] = {}
+        removed: Dict[str, Dict[str, Any]] = {}
+        drive_service = self.drive_helper.drive_service
+
+        while page_token:
+            response = (
+                drive_service.changes()
+                .list(
+                    pageToken=page_token,
+                    spaces="drive",
+                    pageSize=1000,
+                    **self._changes_args(),
+                    fields=(
+                        "nextPageToken, newStartPageToken, changes(fileId, removed, "
+                        f"file({FILE_FIELDS}, parents, trashed))"
+                    ),
+                )
+                .execute()
+            )
+
+            for change in response.get("changes", []):
+                file_id = change.get("fileId")
+                file_info = change.get("file") or {}
+                in_folder = (
+                    not change.get("removed")
+                    and not file_info.get("trashed")
+                    and self.folder_id in file_info.get("parents", [])
+                    and self._matches_extension(file_info.get("name", ""))
+                )
+
+                if in_folder:
+                    removed.pop(file_id, None)
+                    to_download[file_id] = {
+                        key: file_info.get(key) for key in FILE_FIELDS.split(", ")
+                    }
+                else:
+                    to_download.pop(file_id, None)
+                    if file_id in self.manifest["files"]:
+                        removed[file_id] = self.manifest["files"][file_id]
+
+            if "newStartPageToken" in response:
+                self.manifest["start_page_token"] = response["newStartPageToken"]
+            page_token = response.get("nextPageToken")
+
+        return {"files": list(to_download.values()), "removed": list(removed.values())}
+
+    def sync(
+        self,
+        use_changes: bool = False,
+        max_workers: int = 4,
+        delete_removed: bool = False,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Downloads new and changed files and updates the manifest.
+
+        Args:
+            use_changes (bool, optional): If True, follow the Drive Changes API from the token saved
+                by the previous run instead of re-listing the folder. The first run always lists the
+                folder. Defaults to False.
+            max_workers (int, optional): Number of files downloaded in parallel. Defaults to 4.
+            delete_removed (bool, optional): If True, delete local copies of files that were removed
+                from the folder. Defaults to False.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: The manifest entries (including the local 'path') of
+                the files that were "added", "changed" and "removed" since the last sync.
+        """
+        os.makedirs(self.download_path, exist_ok=True)
+
+        changes = self._list_changes() if use_changes else None
+        if changes is not None:
+            candidates = changes["files"]
+            removed = changes["removed"]
+        else:
+            # Take the token before listing, so changes made during the listing are not missed
+            # getStartPageToken takes the same arguments, except includeItemsFromAllDrives
+            token_args = self._changes_args()
+            token_args.pop("includeItemsFromAllDrives")
+            start_page_token = (
+                self.drive_helper.drive_service.changes()
+                .getStartPageToken(**token_args)
+                .execute()
+                .get("startPageToken")
+            )
+            candidates = self.drive_helper.list_image_files(
+                self.folder_id, self.extension, file_fields=FILE_FIELDS
+            )
+            listed_ids = {file_info["id"] for file_info in candidates}
+            removed = [
+                known
+                for file_id, known in self.manifest["files"].items()
+                if file_id not in listed_ids
+            ]
+            self.manifest["start_page_token"] = start_page_token
+
+        added = [f for f in candidates if f["id"] not in self.manifest["files"]]
+        changed = [
+            f
+            for f in candidates
+            if f["id"] in self.manifest["files"] and self._is_changed(f)
+        ]
+
+        def download(file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            file_path = self.drive_helper.download_file(file_info, self.download_path)
+            if file_path is None:
+                return None
+            return {**file_info, "path": file_path}
+
+        n_to_download = len(added) + len(changed)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            added = [entry for entry in executor.map(download, added) if entry]
+            changed = [entry for entry in executor.map(download, changed) if entry]
+
+        # Files that failed to download stay out of the manifest. Dropping the token makes the
+        # next run re-list the folder, so they are retried even when following changes.
+        if len(added) + len(changed) < n_to_download:
+            self.manifest["start_page_token"] = None
+        for entry in added + changed:
+            self.manifest["files"][entry["id"]] = entry
+        for entry in removed:
+            self.manifest["files"].pop(entry["id"], None)
+            if delete_removed and os.path.exists(entry.get("path", "")):
+                os.remove(entry["path"])
+
+        self._save_manifest()
+        print(
+            f"Synced folder {self.folder_id}: {len(added)} added, {len(changed)} changed, {len(removed)} removed"
+        )
+        return {"added": added, "changed": changed, "removed": removed}
@@ -0,0 +1,108 @@
+from typing import Optional, Any, Tuple, Dict
+import json
+import os
+import threading
+import time
+
+
+class DriveIdCache:
+    """
+    A TTL-bounded cache for Google Drive name to ID lookups, optionally persisted to disk.
+
+    Entries expire ttl_seconds after they were stored. If a path is given, the cache is
+    loaded from it on construction and written back whenever an entry is added, so that
+    short-lived jobs can skip lookups made by earlier runs.
+
+    Attributes:
+        ttl_seconds (float): How long an entry stays valid.
+        path (Optional[str]): The JSON file the cache is persisted to, or None.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, path: Optional[str] = None) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            ttl_seconds (float, optional): How long an entry stays valid. Defaults to one hour.
+            path (Optional[str]): The JSON file to persist the cache to. Defaults to None (memory only).
+        """
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._entries = {
+                        key: (stored_at, value)
+                        for key, (stored_at, value) in json.load(f).items()
+                    }
+            except (ValueError, TypeError) as e:
+                print(f"Ignoring unreadable Drive ID cache {path}: {e}")
+
+    @staticmethod
+    def _key(*parts: str) -> str:
+        return "\x1f".join(parts)
+
+    def get(self, *key_parts: str) -> Optional[Any]:
+        """
+        Returns the cached value for a key, or None if it is missing or expired.
+
+        Args:
+            *key_parts (str): The parts of the key, e.g. ("folder", "Recipes").
+
+        Returns:
+            Optional[Any]: The cached value.
+        """
+        key = self._key(*key_parts)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, value: Any, *key_parts: str) -> None:
+        """
+        Stores a JSON-serializable value for a key.
+
+        Args:
+            value (Any): The value to store.
+            *key_parts (str): The parts of the key, e.g. ("folder", "Recipes").
+        """
+        with self._lock:
+            self._entries[self._key(*key_parts)] = (time.time(), value)
+            self._save()
+
+    def invalidate(self, *key_parts: str) -> None:
+        """
+        Removes a key from the cache. With no arguments, removes every key.
+
+        Args:
+            *key_parts (str): The parts of the key to remove.
+        """
+        with self._lock:
+            if key_parts:
+                self._entries.pop(self._key(*key_parts), None)
+            else:
+                self._entries = {}
+            self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        now = time.time()
+        live_entries = {
+            key: entry
+            for key, entry in self._entries.items()
+            if now - entry[0] <= self.ttl_seconds
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(live_entries, f)
+        os.replace(temp_path, self.path)
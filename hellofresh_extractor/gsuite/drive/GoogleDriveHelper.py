@@ -1,8 +1,37 @@
 from hellofresh_extractor.gsuite.drive.GoogleDriveService import GoogleDriveService
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-from typing import Optional, Dict, Any, List
+from hellofresh_extractor.gsuite.drive.DriveIdCache import DriveIdCache
+from hellofresh_extractor.gsuite.drive.utils import (
+    backoff_delay,
+    call_with_retries,
+    is_expired_session_error,
+    is_retryable_error,
+)
+from typing import Optional, Dict, Any, List, Callable, IO, Iterable, Iterator, Tuple
 from googleapiclient.errors import HttpError
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+import json
+import mimetypes
+import mmap
 import os
+import tempfile
+import time
+
+# Maximum number of calls the Drive API accepts in one batch request
+DRIVE_BATCH_LIMIT = 100
+# Maximum number of files the Drive API returns per page
+MAX_PAGE_SIZE = 1000
+
+# Without these, files in shared drives are silently left out of listings and changes
+ALL_DRIVES_ARGS = {"supportsAllDrives": True, "includeItemsFromAllDrives": True}
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+HEIC_MIME_TYPES = ["image/heic", "image/heif"]
+
+# Same default as googleapiclient.http.DEFAULT_CHUNK_SIZE
+DEFAULT_CHUNK_SIZE = 100 * 1024 * 1024
+# Resumable upload chunks must be a multiple of 256KB
+UPLOAD_CHUNK_SIZE = 32 * 256 * 1024
 
 
 class GoogleDriveHelper:
@@ -12,21 +41,44 @@ class GoogleDriveHelper:
 
     Attributes:
         folder_name (str): The name of the top-level folder in Google Drive.
-        drive_service (GoogleDriveService): The service object for interacting with Google Drive API.
+        drive_service (Any): The service object for interacting with Google Drive API. Each thread
+            gets its own service object, since they are not thread-safe.
         top_level_folder_id (str): The ID of the top-level folder.
+        id_cache (DriveIdCache): Cache for name to ID lookups.
     """
 
-    def __init__(self, folder_name: str) -> None:
+    def __init__(
+        self,
+        folder_name: str,
+        cache_ttl: float = 3600,
+        cache_path: Optional[str] = None,
+    ) -> None:
         """
         Initializes the GoogleDriveHelper with the specified folder name.
 
         Args:
             folder_name (str): The name of the folder to be used as the top-level folder.
+            cache_ttl (float, optional): Seconds that name to ID lookups are cached for. Defaults to one hour.
+            cache_path (Optional[str]): JSON file to persist the name to ID cache to, so later runs
+                can skip the lookups. Defaults to None (in-memory only).
         """
         self.folder_name = folder_name
-        self.drive_service = GoogleDriveService().build()
+        self.id_cache = DriveIdCache(ttl_seconds=cache_ttl, path=cache_path)
         self.top_level_folder_id = self.get_folder_id()
 
+    @property
+    def drive_service(self) -> Any:
+        """
+        The Drive service object for the calling thread.
+
+        httplib2 is not thread-safe, so each thread gets its own service object, built on
+        first use and cached process-wide by the ServiceRegistry.
+
+        Returns:
+            Any: The Drive service object for this thread.
+        """
+        return GoogleDriveService().build()
+
     def get_folder_id_from_name(self, folder_name: str) -> List[Dict[str, str]]:
         """
         Retrieve the ID of a Google Drive folder by its name.
@@ -39,6 +91,10 @@ class GoogleDriveHelper:
                   Each dictionary has the keys 'id' and 'name'.
                   If no folder is found, returns an empty list.
         """
+        cached = self.id_cache.get("folder", folder_name)
+        if cached is not None:
+            return cached
+
         query = f"mimeType = 'application/vnd.google-apps.folder' and trashed = false and name = '{folder_name}'"
         response = (
             self.drive_service.files()
@@ -46,6 +102,9 @@ class GoogleDriveHelper:
             .execute()
         )
         files = response.get("files", [])
+        # Misses are not cached, so newly created folders are found straight away
+        if files:
+            self.id_cache.set(files, "folder", folder_name)
         return files
 
     def get_file_id_from_name(self, file_name: str) -> List[Dict[str, str]]:
@@ -60,6 +119,10 @@ class GoogleDriveHelper:
                   Each dictionary has the keys 'id' and 'name'.
                   If no file is found, returns an empty list.
         """
+        cached = self.id_cache.get("file", file_name)
+        if cached is not None:
+            return cached
+
         query = f"mimeType != 'application/vnd.google-apps.folder' and trashed = false and name = '{file_name}'"
         response = (
             self.drive_service.files()
@@ -67,51 +130,88 @@ class GoogleDriveHelper:
             .execute()
         )
         files = response.get("files", [])
+        if files:
+            self.id_cache.set(files, "file", file_name)
         return files
 
-    def list_all_files(self) -> Optional[List[Dict[str, str]]]:
+    def resolve_path(self, path: str) -> str:
+        """
+        Retrieves the ID of a file or folder from its path, e.g. "Recipes/HelloFreshImages/2025".
+
+        The first component is looked up by name anywhere in Drive; each following component
+        must be a child of the previous one. Every lookup is cached.
+
+        Args:
+            path (str): The slash-separated path.
+
+        Returns:
+            str: The ID of the last component of the path.
+
+        Raises:
+            ValueError: If any component of the path is not found.
+        """
+        components = [component for component in path.split("/") if component]
+        if not components:
+            raise ValueError("The path must contain at least one folder name")
+
+        folders = self.get_folder_id_from_name(components[0])
+        if not folders:
+            raise ValueError(f"No folder called {components[0]} is found")
+
+        current_id = folders[0]["id"]
+        for component in components[1:]:
+            current_id = self._get_child_id(current_id, component)
+        return current_id
+
+    def _get_child_id(self, parent_id: str, name: str) -> str:
+        """
+        Retrieves the ID of a file or folder by name within a parent folder, using the cache.
+
+        Raises:
+            ValueError: If there is no such child.
+        """
+        cached = self.id_cache.get("child", parent_id, name)
+        if cached is not None:
+            return cached
+
+        response = (
+            self.drive_service.files()
+            .list(
+                q=f"'{parent_id}' in parents and trashed = false and name = '{name}'",
+                spaces="drive",
+                fields="files(id, name)",
+            )
+            .execute()
+        )
+        files = response.get("files", [])
+        if not files:
+            raise ValueError(f"No file or folder called {name} is found in {parent_id}")
+
+        child_id = files[0]["id"]
+        self.id_cache.set(child_id, "child", parent_id, name)
+        return child_id
+
+    def list_all_files(self, verbose: bool = True) -> Optional[List[Dict[str, str]]]:
         """
         List all files in the user's Google Drive.
 
         This method retrieves all files, paginating through results if necessary.
         Each file's ID and name are printed to the console and collected in a list.
+        Use iter_files to stream a large listing instead.
+
+        Args:
+            verbose (bool, optional): If True, print each file found. Defaults to True.
 
         Returns:
             list: A list of dictionaries, each containing the file ID and name.
                   If an error occurs during the API call, returns None.
         """
-        # create drive api client
         files: List[Dict[str, str]] = []
-        page_token: Optional[str] = None
         try:
-            while True:
-                # pylint: disable=maybe-no-member
-                response = (
-                    self.drive_service.files()
-                    .list(
-                        spaces="drive",
-                        fields="nextPageToken, files(id, name)",
-                        pageToken=page_token,
-                    )
-                    .execute()
-                )
-                for file in response.get("files", []):
-                    # Process change
+            for file in self.iter_files(include_trashed=True):
+                if verbose:
                     print(f"Found file: {file.get('name')}, {file.get('id')}")
-
-                    file_id = file.get("id")
-                    file_name = file.get("name")
-
-                    files.append(
-                        {
-                            "id": file_id,
-                            "name": file_name,
-                        }
-                    )
-
-                page_token = response.get("nextPageToken", None)
-                if page_token is None:
-                    break
+                files.append({"id": file.get("id"), "name": file.get("name")})
 
         except HttpError as error:
             print(f"An error occurred: {error}")
@@ -119,6 +219,151 @@ class GoogleDriveHelper:
 
         return files
 
+    def iter_files(
+        self,
+        folder_id: Optional[str] = None,
+        mime_types: Optional[List[str]] = None,
+        query: Optional[str] = None,
+        file_fields: str = "id, name",
+        page_size: int = MAX_PAGE_SIZE,
+        include_trashed: bool = False,
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Lazily lists files, fetching one page at a time, so large listings start yielding
+        immediately and use constant memory. Safe to call from several threads at once.
+
+        Example usage:
+        for file in drive_helper.iter_files(folder_id=folder_id, mime_types=HEIC_MIME_TYPES):
+            print(file["name"])
+
+        Args:
+            folder_id (Optional[str]): Only list direct children of this folder. Defaults to None (all of Drive).
+            mime_types (Optional[List[str]]): Only list files with one of these MIME types.
+            query (Optional[str]): An extra Drive query clause, combined with the filters above.
+            file_fields (str, optional): The file fields to return. Defaults to "id, name".
+            page_size (int, optional): Files requested per page, at most 1000. Defaults to 1000.
+            include_trashed (bool, optional): If True, also list trashed files. Defaults to False.
+
+        Yields:
+            Dict[str, str]: One dictionary per file, with the requested file fields.
+        """
+        request_args = self._list_request_args(
+            folder_id, mime_types, query, file_fields, page_size, include_trashed
+        )
+        page_token: Optional[str] = None
+        while True:
+            files, page_token = self._list_page(request_args, page_token)
+            yield from files
+            if not page_token:
+                break
+
+    @staticmethod
+    def _list_request_args(
+        folder_id: Optional[str],
+        mime_types: Optional[List[str]],
+        query: Optional[str],
+        file_fields: str,
+        page_size: int,
+        include_trashed: bool,
+    ) -> Dict[str, Any]:
+        """
+        Builds the files().list arguments for iter_files and iter_folder_tree.
+        """
+        clauses = []
+        if folder_id:
+            clauses.append(f"'{folder_id}' in parents")
+        if mime_types:
+            clauses.append(
+                "("
+                + " or ".join(f"mimeType = '{mime_type}'" for mime_type in mime_types)
+                + ")"
+            )
+        if query:
+            clauses.append(f"({query})")
+        if not include_trashed:
+            clauses.append("trashed = false")
+
+        request_args = {
+            "spaces": "drive",
+            "fields": f"nextPageToken, files({file_fields})",
+            "pageSize": min(page_size, MAX_PAGE_SIZE),
+            **ALL_DRIVES_ARGS,
+        }
+        if clauses:
+            request_args["q"] = " and ".join(clauses)
+        return request_args
+
+    def _list_page(
+        self, request_args: Dict[str, Any], page_token: Optional[str]
+    ) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """
+        Fetches one page of a files().list listing.
+
+        Returns:
+            Tuple[List[Dict[str, str]], Optional[str]]: The files on the page and the token of
+                the next page, or None on the last page.
+        """
+        response = call_with_retries(
+            self.drive_service.files().list(pageToken=page_token, **request_args).execute
+        )
+        return response.get("files", []), response.get("nextPageToken")
+
+    def iter_folder_tree(
+        self,
+        folder_id: str,
+        mime_types: Optional[List[str]] = None,
+        file_fields: str = "id, name",
+        page_size: int = MAX_PAGE_SIZE,
+        max_workers: int = 4,
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Lazily lists all files in a folder and its subfolders, listing up to max_workers
+        folders concurrently. Files are yielded as each folder finishes, in no particular order.
+
+        Args:
+            folder_id (str): The ID of the root folder.
+            mime_types (Optional[List[str]]): Only yield files with one of these MIME types.
+            file_fields (str, optional): The file fields to return. Defaults to "id, name".
+            page_size (int, optional): Files requested per page, at most 1000. Defaults to 1000.
+            max_workers (int, optional): Number of folders listed concurrently. Defaults to 4.
+
+        Yields:
+            Dict[str, str]: One dictionary per file, with the requested file fields and 'parents'.
+        """
+        # Subfolders must always be listed so that the traversal can descend into them
+        listed_mime_types = (
+            mime_types + [FOLDER_MIME_TYPE] if mime_types else None
+        )
+        fields = f"{file_fields}, mimeType, parents"
+
+        def list_page(
+            current_folder_id: str, page_token: Optional[str]
+        ) -> Tuple[str, List[Dict[str, str]], Optional[str]]:
+            files, next_page_token = self._list_page(
+                self._list_request_args(
+                    current_folder_id, listed_mime_types, None, fields, page_size, False
+                ),
+                page_token,
+            )
+            return current_folder_id, files, next_page_token
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Each task lists one page, so a huge folder is yielded page by page and its next
+            # page is queued alongside the other folders
+            running = {executor.submit(list_page, folder_id, None)}
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    listed_folder_id, files, page_token = future.result()
+                    if page_token:
+                        running.add(executor.submit(list_page, listed_folder_id, page_token))
+                    for file in files:
+                        if file.get("mimeType") == FOLDER_MIME_TYPE:
+                            running.add(executor.submit(list_page, file["id"], None))
+                            if mime_types and FOLDER_MIME_TYPE not in mime_types:
+                                continue
+                        yield file
+
     @staticmethod
     def create_export_link(file_id: str) -> str:
         """
@@ -167,6 +412,8 @@ class GoogleDriveHelper:
             parent_folder_id = self.top_level_folder_id
 
         file_metadata = {"name": image_name, "parents": [parent_folder_id]}
+        from googleapiclient.http import MediaFileUpload
+
         media = MediaFileUpload(image_name, mimetype="image/jpg")
         file = (
             self.drive_service.files()
@@ -226,8 +473,176 @@ class GoogleDriveHelper:
             .create(body=folder_metadata, fields="id")
             .execute()
         )
+        self.id_cache.set(folder.get("id"), "child", parents[0], new_folder_name)
         return folder.get("id")
 
+    def _execute_batch(
+        self,
+        request_factories: List[Callable[[Any], Any]],
+        transform: Callable[[Any], Any] = lambda response: response,
+        max_retries: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Executes many Drive API calls as batch HTTP requests of up to DRIVE_BATCH_LIMIT calls.
+
+        Sub-requests that fail with a retryable error (429, 5xx) are retried with exponential
+        backoff in later batches; successful sub-requests are never re-sent.
+
+        Args:
+            request_factories (List[Callable[[Any], Any]]): One function per call, taking a Drive
+                service object and returning the (unexecuted) request.
+            transform (Callable[[Any], Any], optional): Applied to each successful response.
+            max_retries (int, optional): Maximum number of retries per call. Defaults to 5.
+
+        Returns:
+            List[Dict[str, Any]]: One dict per call, in input order, with the keys 'result'
+                (the transformed response, or None) and 'error' (None, or the error message).
+        """
+        drive_service = self.drive_service
+        results: List[Optional[Dict[str, Any]]] = [None] * len(request_factories)
+        pending = list(range(len(request_factories)))
+        attempt = 0
+
+        while pending:
+            failed: List[int] = []
+
+            def record(index: int, error: Exception) -> None:
+                if attempt < max_retries and is_retryable_error(error):
+                    failed.append(index)
+                else:
+                    results[index] = {"result": None, "error": str(error)}
+
+            def callback(request_id: str, response: Any, exception: Exception) -> None:
+                index = int(request_id)
+                if exception is not None:
+                    record(index, exception)
+                    return
+                try:
+                    results[index] = {"result": transform(response), "error": None}
+                except Exception as e:
+                    results[index] = {"result": None, "error": str(e)}
+
+            for start in range(0, len(pending), DRIVE_BATCH_LIMIT):
+                chunk = pending[start : start + DRIVE_BATCH_LIMIT]
+                batch = drive_service.new_batch_http_request(callback=callback)
+                for index in chunk:
+                    batch.add(
+                        request_factories[index](drive_service), request_id=str(index)
+                    )
+                try:
+                    batch.execute()
+                except Exception as e:
+                    # The whole batch failed, so none of its callbacks ran
+                    for index in chunk:
+                        record(index, e)
+
+            if failed:
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+            pending = sorted(failed)
+
+        return results
+
+    def create_new_permissions_bulk(
+        self, file_ids: List[str], permission: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Creates the same permission on many files using batch requests.
+
+        Args:
+            file_ids (List[str]): The IDs of the files.
+            permission (Dict[str, Any]): The permission details.
+
+        Returns:
+            List[Dict[str, Any]]: Per file, in input order, a dict with the keys 'result'
+                (the created permission) and 'error'.
+        """
+        return self._execute_batch(
+            [
+                lambda service, file_id=file_id: service.permissions().create(
+                    fileId=file_id, body=permission
+                )
+                for file_id in file_ids
+            ]
+        )
+
+    def get_webview_links_bulk(self, file_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Retrieves the web view links of many files using batch requests.
+
+        Args:
+            file_ids (List[str]): The IDs of the files.
+
+        Returns:
+            List[Dict[str, Any]]: Per file, in input order, a dict with the keys 'result'
+                (the web view link) and 'error'.
+        """
+        return self._execute_batch(
+            [
+                lambda service, file_id=file_id: service.files().get(
+                    fileId=file_id, fields="webViewLink"
+                )
+                for file_id in file_ids
+            ],
+            transform=lambda response: response["webViewLink"],
+        )
+
+    def get_file_ids_from_names_bulk(
+        self, file_names: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Looks up the IDs of many files by name using batch requests.
+
+        Args:
+            file_names (List[str]): The names of the files.
+
+        Returns:
+            List[Dict[str, Any]]: Per name, in input order, a dict with the keys 'result'
+                (a list of dictionaries with the keys 'id' and 'name', as returned by
+                get_file_id_from_name) and 'error'.
+        """
+        return self._execute_batch(
+            [
+                lambda service, file_name=file_name: service.files().list(
+                    q=f"mimeType != 'application/vnd.google-apps.folder' and trashed = false and name = '{file_name}'",
+                    spaces="drive",
+                    fields="nextPageToken, files(id, name)",
+                )
+                for file_name in file_names
+            ],
+            transform=lambda response: response.get("files", []),
+        )
+
+    def create_new_folders_bulk(
+        self, new_folder_names: List[str], parent_folder_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Creates many folders using batch requests.
+
+        Args:
+            new_folder_names (List[str]): The names of the new folders.
+            parent_folder_id (Optional[str]): The ID of the parent folder. If None, uses the top-level folder.
+
+        Returns:
+            List[Dict[str, Any]]: Per folder, in input order, a dict with the keys 'result'
+                (the ID of the new folder) and 'error'.
+        """
+        parents = [parent_folder_id or self.top_level_folder_id]
+        return self._execute_batch(
+            [
+                lambda service, name=name: service.files().create(
+                    body={
+                        "name": name,
+                        "mimeType": "application/vnd.google-apps.folder",
+                        "parents": parents,
+                    },
+                    fields="id",
+                )
+                for name in new_folder_names
+            ],
+            transform=lambda response: response.get("id"),
+        )
+
     def get_folder_id(self) -> str:
         """
         Retrieves the ID of the top-level folder based on the folder name.
@@ -238,6 +653,10 @@ class GoogleDriveHelper:
         Raises:
             ValueError: If no folder with the specified name is found.
         """
+        cached = self.id_cache.get("top_level", self.folder_name)
+        if cached is not None:
+            return cached
+
         folder_details = (
             self.drive_service.files()
             .list(
@@ -249,7 +668,9 @@ class GoogleDriveHelper:
         if not folder_details.get("files"):
             raise ValueError(f"No folder called {self.folder_name} is found")
 
-        return folder_details["files"][0].get("id", None)
+        folder_id = folder_details["files"][0].get("id", None)
+        self.id_cache.set(folder_id, "top_level", self.folder_name)
+        return folder_id
 
     def create_basic_document(
         self, document_name: str, parent_folder_id: Optional[str] = None
@@ -282,78 +703,223 @@ class GoogleDriveHelper:
 
         return doc_id
 
-    def download_image_files(
-        self, folder_id: str, download_path: str = "./downloads", extension="HEIC"
-    ) -> List[str]:
+    def list_image_files(
+        self,
+        folder_id: str,
+        extension: str = "HEIC",
+        file_fields: str = "id, name",
+        mime_types: Optional[List[str]] = None,
+    ) -> List[Dict[str, str]]:
         """
-        Downloads all image files from a specified Google Drive folder.
+        Lists all image files with a given extension in a Google Drive folder.
 
         Args:
             folder_id (str): The ID of the Google Drive folder.
-            download_path (str, optional): Directory to save downloaded files.
+            extension (str, optional): The image file extension to match. Defaults to "HEIC".
+            file_fields (str, optional): The file fields to return. Defaults to "id, name".
+            mime_types (Optional[List[str]]): If set, match files by MIME type (e.g. HEIC_MIME_TYPES)
+                instead of by extension.
 
         Returns:
-            List[str]: Paths to the downloaded files.
+            List[Dict[str, str]]: A list of dictionaries with the requested file fields.
+        """
+        return list(self.iter_image_files(folder_id, extension, file_fields, mime_types))
+
+    def iter_image_files(
+        self,
+        folder_id: str,
+        extension: str = "HEIC",
+        file_fields: str = "id, name",
+        mime_types: Optional[List[str]] = None,
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Lazily lists image files in a Google Drive folder. See list_image_files.
         """
+        if mime_types:
+            return self.iter_files(
+                folder_id=folder_id, mime_types=mime_types, file_fields=file_fields
+            )
 
-        os.makedirs(download_path, exist_ok=True)
+        query = f"name contains '.{extension.lower()}' or name contains '.{extension.upper()}'"
+        return self.iter_files(folder_id=folder_id, query=query, file_fields=file_fields)
 
-        def get_all_image_files(image_extension=extension):
-            """Get all image files from the folder with pagination support."""
-            files = []
-            page_token = None
-            query = f"'{folder_id}' in parents and (name contains '.{image_extension.lower()}' or name contains '.{image_extension.upper()}') and trashed = false"
-
-            while True:
-                response = (
-                    self.drive_service.files()
-                    .list(
-                        q=query,
-                        spaces="drive",
-                        fields="nextPageToken, files(id, name)",
-                        pageToken=page_token,
-                    )
-                    .execute()
-                )
+    def download_file(
+        self,
+        file_info: Dict[str, str],
+        download_path: str = "./downloads",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_retries: int = 5,
+    ) -> Optional[str]:
+        """
+        Downloads a single file to a local directory. Safe to call from several threads at once.
 
-                files.extend(response.get("files", []))
-                page_token = response.get("nextPageToken")
-                if not page_token:
-                    break
+        Args:
+            file_info (Dict[str, str]): A dictionary with the file's 'id' and 'name'.
+            download_path (str, optional): Directory to save the downloaded file.
+            chunk_size (int, optional): Number of bytes requested per chunk. Defaults to 100MB.
+            max_retries (int, optional): Number of times to retry the download after a 429/5xx
+                or connection error, with exponential backoff. Defaults to 5.
 
-            return files
+        Returns:
+            Optional[str]: The path to the downloaded file, or None if the download failed.
+        """
+        file_path = os.path.join(download_path, file_info.get("name"))
+
+        with open(file_path, "wb") as f:
+            downloaded = self.download_to_stream(
+                file_info, f, chunk_size=chunk_size, max_retries=max_retries
+            )
 
-        def download_single_file(file_info):
-            """Download a single file given its info."""
-            file_id, file_name = file_info.get("id"), file_info.get("name")
-            file_path = os.path.join(download_path, file_name)
+        return file_path if downloaded else None
 
+    def download_to_stream(
+        self,
+        file_info: Dict[str, str],
+        stream: IO[bytes],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_retries: int = 5,
+    ) -> bool:
+        """
+        Downloads a file's content into a seekable binary stream, replacing anything already in it.
+        Safe to call from several threads at once.
+
+        Args:
+            file_info (Dict[str, str]): A dictionary with the file's 'id' and 'name'.
+            stream (IO[bytes]): The stream to write to, e.g. an open file or a BytesIO.
+            chunk_size (int, optional): Number of bytes requested per chunk. Defaults to 100MB.
+            max_retries (int, optional): Number of times to retry the download after a 429/5xx
+                or connection error, with exponential backoff. Defaults to 5.
+
+        Returns:
+            bool: True if the download succeeded.
+        """
+        from googleapiclient.http import MediaIoBaseDownload
+
+        drive_service = self.drive_service
+
+        def download() -> None:
+            # Each attempt starts the file from scratch
+            stream.seek(0)
+            stream.truncate()
+            request = drive_service.files().get_media(fileId=file_info.get("id"))
+            downloader = MediaIoBaseDownload(stream, request, chunksize=chunk_size)
+
+            done = False
+            while not done:
+                _, done = downloader.next_chunk()
+
+        try:
+            call_with_retries(download, max_retries=max_retries)
+            return True
+        except Exception as e:
+            print(f"Error downloading {file_info.get('name')}: {e}")
+            return False
+
+    def iter_downloads_in_memory(
+        self,
+        files: Iterable[Dict[str, str]],
+        spill_threshold: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_retries: int = 5,
+    ) -> Iterator[Tuple[Dict[str, str], memoryview]]:
+        """
+        Downloads files one at a time into a reused in-memory buffer, without writing them to disk.
+
+        The yielded memoryview is only valid until the next item is requested, since the buffer
+        is then reused. It can be passed straight to decode_image, or wrapped in a BytesIO for
+        Image.open; copy it with bytes(view) to keep the data.
+
+        Example usage:
+        files = drive_helper.list_image_files(folder_id, file_fields="id, name, size")
+        for file_info, data in drive_helper.iter_downloads_in_memory(files, spill_threshold=64 * 1024 * 1024):
+            image = decode_image(data)
+
+        Args:
+            files (Iterable[Dict[str, str]]): File dictionaries with 'id' and 'name', and
+                optionally 'size'.
+            spill_threshold (Optional[int]): Files whose 'size' is larger than this many bytes are
+                downloaded to a temporary file and memory-mapped instead. Defaults to None (never spill).
+            chunk_size (int, optional): Number of bytes requested per chunk. Defaults to 100MB.
+            max_retries (int, optional): Number of retries per file on 429/5xx errors. Defaults to 5.
+
+        Yields:
+            Tuple[Dict[str, str], memoryview]: The file dictionary and the file content. Files that
+                fail to download are skipped.
+        """
+        buffer = BytesIO()
+
+        for file_info in files:
+            size = int(file_info.get("size") or 0)
+            if spill_threshold is not None and size > spill_threshold:
+                with tempfile.TemporaryFile() as f:
+                    if not self.download_to_stream(file_info, f, chunk_size, max_retries):
+                        continue
+                    f.flush()
+                    # An empty file cannot be memory-mapped
+                    if os.fstat(f.fileno()).st_size == 0:
+                        yield file_info, memoryview(b"")
+                        continue
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        view = memoryview(mapped)
+                        try:
+                            yield file_info, view
+                        finally:
+                            view.release()
+                continue
+
+            if not self.download_to_stream(file_info, buffer, chunk_size, max_retries):
+                continue
+            view = buffer.getbuffer()
             try:
-                with open(file_path, "wb") as f:
-                    request = self.drive_service.files().get_media(fileId=file_id)
-                    downloader = MediaIoBaseDownload(f, request)
+                yield file_info, view
+            finally:
+                # The buffer cannot be truncated for the next file while a view is exported
+                view.release()
 
-                    done = False
-                    while not done:
-                        _, done = downloader.next_chunk()
+    def download_image_files(
+        self,
+        folder_id: str,
+        download_path: str = "./downloads",
+        extension="HEIC",
+        max_workers: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_retries: int = 5,
+        mime_types: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Downloads all image files from a specified Google Drive folder.
+
+        Args:
+            folder_id (str): The ID of the Google Drive folder.
+            download_path (str, optional): Directory to save downloaded files.
+            extension (str, optional): The image file extension to match. Defaults to "HEIC".
+            max_workers (int, optional): Number of files downloaded in parallel. Defaults to 1.
+            chunk_size (int, optional): Number of bytes requested per chunk. Defaults to 100MB.
+            max_retries (int, optional): Number of retries per file on 429/5xx errors. Defaults to 5.
+            mime_types (Optional[List[str]]): If set, match files by MIME type instead of by extension.
+
+        Returns:
+            List[str]: Paths to the downloaded files.
+        """
 
-                return file_path
-            except Exception as e:
-                print(f"Error downloading {file_name}: {e}")
-                return None
+        os.makedirs(download_path, exist_ok=True)
 
         try:
             # Get all files first, then download them
-            image_files = get_all_image_files(extension)
+            image_files = self.list_image_files(
+                folder_id, extension, mime_types=mime_types
+            )
 
-            # Download each file
-            downloaded_paths = []
+            def download(file: Dict[str, str]) -> Optional[str]:
+                return self.download_file(file, download_path, chunk_size, max_retries)
 
-            for file in image_files:
-                file_path = download_single_file(file)
-                if file_path:
-                    downloaded_paths.append(file_path)
-            return downloaded_paths
+            if max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    file_paths = list(executor.map(download, image_files))
+            else:
+                file_paths = [download(file) for file in image_files]
+
+            return [file_path for file_path in file_paths if file_path]
 
         except HttpError as error:
             print(f"API error: {error}")
@@ -387,6 +953,8 @@ class GoogleDriveHelper:
             "parents": [parent_folder_id],
         }
 
+        from googleapiclient.http import MediaFileUpload
+
         # Create media object for the file
         media = MediaFileUpload(file_path, mimetype="text/csv", resumable=True)
 
@@ -406,3 +974,194 @@ class GoogleDriveHelper:
         except HttpError as error:
             print(f"An error occurred while uploading the file: {error}")
             return {}
+
+    def upload_file_resumable(
+        self,
+        file_path: str,
+        parent_folder_id: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+        max_retries: int = 5,
+    ) -> Dict[str, str]:
+        """
+        Uploads a file to Google Drive in chunks through a resumable upload session.
+
+        Failed chunks are retried with exponential backoff, resuming from the last byte the
+        server received. The session URI is saved next to the file while the upload is in
+        progress, so that re-running the upload after the process was interrupted resumes
+        the same session instead of starting over. Safe to call from several threads at once.
+
+        Args:
+            file_path (str): Path to the local file to upload.
+            parent_folder_id (Optional[str]): ID of the folder to upload to. If None, uploads to the top-level folder.
+            mime_type (Optional[str]): The MIME type of the file. Guessed from the file name if None.
+            chunk_size (int, optional): Bytes sent per request, a multiple of 256KB. Defaults to 8MB.
+            max_retries (int, optional): Number of retries per chunk on 429/5xx errors. Defaults to 5.
+
+        Returns:
+            Dict[str, str]: Dictionary containing the uploaded file's ID and name, or an empty
+                dictionary if the upload failed.
+        """
+        file_name = os.path.basename(file_path)
+        mime_type = (
+            mime_type or mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        )
+        file_metadata = {
+            "name": file_name,
+            "parents": [parent_folder_id or self.top_level_folder_id],
+        }
+
+        from googleapiclient.http import MediaFileUpload
+
+        session_path = f"{file_path}.upload-session.json"
+        file_stat = os.stat(file_path)
+        session_key = {"size": file_stat.st_size, "mtime": file_stat.st_mtime}
+
+        def new_request() -> Any:
+            media = MediaFileUpload(
+                file_path, mimetype=mime_type, chunksize=chunk_size, resumable=True
+            )
+            return self.drive_service.files().create(
+                body=file_metadata, media_body=media, fields="id,name"
+            )
+
+        def discard_session() -> None:
+            if os.path.exists(session_path):
+                os.remove(session_path)
+
+        request = new_request()
+        response = None
+        if os.path.exists(session_path):
+            with open(session_path) as f:
+                session = json.load(f)
+            if session.get("file") == session_key:
+                try:
+                    response = call_with_retries(
+                        lambda: self._resume_upload_session(
+                            request, session["resumable_uri"], file_stat.st_size
+                        ),
+                        max_retries=max_retries,
+                    )
+                except Exception as e:
+                    if is_retryable_error(e):
+                        # The session may still be alive, so keep it for the next attempt
+                        print(f"An error occurred while resuming the upload of {file_name}: {e}")
+                        return {}
+                    print(
+                        f"Could not resume the upload of {file_name}, starting a new session: {e}"
+                    )
+                    discard_session()
+                    request = new_request()
+
+        attempt = 0
+        restarted = False
+        try:
+            while response is None:
+                try:
+                    _, response = request.next_chunk()
+                    attempt = 0
+                except Exception as e:
+                    # An expired session cannot be resumed, so start over once with a new one
+                    if is_expired_session_error(e) and not restarted:
+                        print(f"Upload session of {file_name} expired, starting a new one")
+                        discard_session()
+                        request = new_request()
+                        restarted = True
+                        continue
+                    if attempt >= max_retries or not is_retryable_error(e):
+                        raise
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+
+                if response is None and request.resumable_uri:
+                    with open(session_path, "w") as f:
+                        json.dump(
+                            {
+                                "resumable_uri": request.resumable_uri,
+                                "file": session_key,
+                            },
+                            f,
+                        )
+
+        except Exception as error:
+            print(f"An error occurred while uploading {file_name}: {error}")
+            # Only a session that failed on a transient error is worth resuming next time
+            if not is_retryable_error(error):
+                discard_session()
+            return {}
+
+        discard_session()
+
+        print(
+            f"Uploaded '{response.get('name')}' to Google Drive (ID: {response.get('id')})"
+        )
+        return {"id": response.get("id"), "name": response.get("name")}
+
+    def _resume_upload_session(
+        self, request: Any, resumable_uri: str, total_size: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Asks the server how much of an interrupted resumable upload it has received, and points
+        the request at the next byte to send.
+
+        Args:
+            request (HttpRequest): A fresh resumable upload request for the same file.
+            resumable_uri (str): The session URI saved by the interrupted upload.
+            total_size (int): The size of the file in bytes.
+
+        Returns:
+            Optional[Dict[str, Any]]: The file metadata if the upload had already completed, otherwise None.
+
+        Raises:
+            HttpError: If the session can no longer be used, e.g. it expired (404/410).
+        """
+        resp, content = request.http.request(
+            resumable_uri,
+            method="PUT",
+            body=b"",
+            headers={"Content-Range": f"bytes */{total_size}", "Content-Length": "0"},
+        )
+        if resp.status in (200, 201):
+            return json.loads(content)
+        if resp.status != 308:
+            raise HttpError(resp, content, uri=resumable_uri)
+
+        # The Range header is absent when no bytes were received yet
+        received = resp.get("range")
+        request.resumable_uri = resumable_uri
+        request.resumable_progress = int(received.split("-")[1]) + 1 if received else 0
+        return None
+
+    def upload_files(
+        self,
+        file_paths: List[str],
+        parent_folder_id: Optional[str] = None,
+        max_workers: int = 4,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+        max_retries: int = 5,
+    ) -> List[Dict[str, str]]:
+        """
+        Uploads several files concurrently with upload_file_resumable.
+
+        Args:
+            file_paths (List[str]): Paths to the local files to upload.
+            parent_folder_id (Optional[str]): ID of the folder to upload to. If None, uploads to the top-level folder.
+            max_workers (int, optional): Number of files uploaded at once. Defaults to 4.
+            chunk_size (int, optional): Bytes sent per request, a multiple of 256KB. Defaults to 8MB.
+            max_retries (int, optional): Number of retries per chunk on 429/5xx errors. Defaults to 5.
+
+        Returns:
+            List[Dict[str, str]]: Per file, in input order, the uploaded file's ID and name, or an
+                empty dictionary if that upload failed.
+        """
+
+        def upload(file_path: str) -> Dict[str, str]:
+            return self.upload_file_resumable(
+                file_path,
+                parent_folder_id,
+                chunk_size=chunk_size,
+                max_retries=max_retries,
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(upload, file_paths))
@@ -1,5 +1,4 @@
 from hellofresh_extractor.gsuite.base.GSuiteService import GSuiteService
-from googleapiclient.discovery import build
 from typing import Any
 
 
@@ -35,4 +34,6 @@ class GoogleDriveService(GSuiteService):
         Returns:
             Any: The Google Drive service object.
         """
+        from googleapiclient.discovery import build
+
         return build("drive", "v3", credentials=creds, cache_discovery=False)
@@ -0,0 +1,79 @@
+import random
+import socket
+import time
+from typing import Callable, TypeVar
+from googleapiclient.errors import HttpError
+
+T = TypeVar("T")
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Checks whether a failed Drive API call is worth retrying: rate limiting (429),
+    server errors (5xx) and dropped connections.
+
+    Args:
+        error (Exception): The error raised by the API call.
+
+    Returns:
+        bool: True if the call should be retried.
+    """
+    if isinstance(error, HttpError):
+        return error.resp.status == 429 or error.resp.status >= 500
+    return isinstance(error, (socket.timeout, ConnectionError, TimeoutError))
+
+
+def is_expired_session_error(error: Exception) -> bool:
+    """
+    Checks whether a resumable upload failed because its session no longer exists.
+
+    Args:
+        error (Exception): The error raised by the upload.
+
+    Returns:
+        bool: True for 404 and 410 responses.
+    """
+    return isinstance(error, HttpError) and error.resp.status in (404, 410)
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 64.0) -> float:
+    """
+    Returns the delay before a retry, using exponential backoff with full jitter.
+
+    Args:
+        attempt (int): The number of attempts made so far, starting at 0.
+        base_delay (float, optional): The delay scale in seconds. Defaults to 1.0.
+        max_delay (float, optional): The maximum delay in seconds. Defaults to 64.0.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+def call_with_retries(
+    fn: Callable[[], T], max_retries: int = 5, base_delay: float = 1.0
+) -> T:
+    """
+    Calls fn, retrying with exponential backoff if it fails with a retryable error.
+
+    Args:
+        fn (Callable[[], T]): The call to make.
+        max_retries (int, optional): The maximum number of retries. Defaults to 5.
+        base_delay (float, optional): The backoff delay scale in seconds. Defaults to 1.0.
+
+    Returns:
+        T: The result of fn.
+
+    Raises:
+        Exception: The last error, if it is not retryable or retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            time.sleep(backoff_delay(attempt, base_delay))
+            attempt += 1
@@ -0,0 +1,160 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from typing import Deque, Iterable, Iterator, Optional, Tuple, Union
+from PIL import Image
+
+ImageSource = Union[str, bytes, bytearray, memoryview]
+
+_heif_registered = False
+
+
+def register_heif() -> None:
+    """
+    Registers the pillow_heif opener with PIL once per process.
+    """
+    global _heif_registered
+    if not _heif_registered:
+        from pillow_heif import register_heif_opener
+
+        register_heif_opener()
+        _heif_registered = True
+
+
+def decode_image(source: ImageSource, max_size: Optional[int] = None) -> Image.Image:
+    """
+    Decodes an image file or buffer (including HEIC) to an RGB PIL image.
+
+    Args:
+        source (ImageSource): A file path, or the raw bytes of an image file.
+        max_size (Optional[int]): If set, the image is downscaled so that its longest side
+            is at most max_size pixels. JPEGs are downscaled during decoding.
+
+    Returns:
+        Image.Image: The decoded RGB image.
+    """
+    register_heif()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = BytesIO(source)
+
+    with Image.open(source) as opened:
+        if max_size:
+            # Only has an effect for formats that can decode at reduced scale, such as JPEG
+            opened.draft("RGB", (max_size, max_size))
+        image = opened.convert("RGB")
+
+    if max_size:
+        image.thumbnail((max_size, max_size))
+    return image
+
+
+class ImageDecoder:
+    """
+    Decodes images in a pool of worker processes, streaming the results back in input order.
+
+    HEIC decoding is CPU heavy, so running it in separate processes lets it overlap with
+    network bound work such as downloads and LLM calls. At most `prefetch` images are
+    decoded ahead of the consumer, which caps the memory held by decoded images.
+
+    Example usage:
+    with ImageDecoder(max_workers=4, max_size=2048) as decoder:
+        for path, image in decoder.decode(images):
+            if image is not None:
+                result = gemini_caller.invoke(
+                    system_message=multimodal_system_prompt,
+                    input_content=[image, multimodal_user_query],
+                    output_schema=ExtractedMeal,
+                )
+
+    Attributes:
+        max_workers (int): The number of decoding processes.
+        max_size (Optional[int]): Maximum length of the longest image side, or None to keep full resolution.
+        prefetch (int): Maximum number of images decoded ahead of the consumer.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+    ) -> None:
+        """
+        Initializes the decoder. The process pool is started on first use.
+
+        Args:
+            max_workers (Optional[int]): The number of decoding processes. Defaults to the number of CPUs.
+            max_size (Optional[int]): Maximum length of the longest image side. Defaults to None (no downscaling).
+            prefetch (Optional[int]): Maximum number of images decoded ahead of the consumer.
+                Defaults to twice the number of workers.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_size = max_size
+        self.prefetch = max(1, prefetch or 2 * self.max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=register_heif
+            )
+        return self._executor
+
+    def decode(
+        self, sources: Iterable[ImageSource]
+    ) -> Iterator[Tuple[ImageSource, Optional[Image.Image]]]:
+        """
+        Decodes images, yielding them in the same order as the sources.
+
+        The sources iterable is consumed lazily, so it can itself be a stream (e.g. of downloads).
+
+        Args:
+            sources (Iterable[ImageSource]): File paths or raw image bytes.
+
+        Yields:
+            Tuple[ImageSource, Optional[Image.Image]]: The source and its decoded image. The image
+                is None if decoding failed.
+        """
+        executor = self._get_executor()
+        pending: Deque[Tuple[ImageSource, Future]] = deque()
+
+        def submit(source: ImageSource) -> None:
+            # memoryviews cannot be pickled across to the worker processes
+            payload = bytes(source) if isinstance(source, memoryview) else source
+            pending.append(
+                (source, executor.submit(decode_image, payload, self.max_size))
+            )
+
+        for source in sources:
+            submit(source)
+            if len(pending) >= self.prefetch:
+                yield self._next_result(pending)
+
+        while pending:
+            yield self._next_result(pending)
+
+    @staticmethod
+    def _next_result(
+        pending: Deque[Tuple[ImageSource, Future]]
+    ) -> Tuple[ImageSource, Optional[Image.Image]]:
+        source, future = pending.popleft()
+        try:
+            return source, future.result()
+        except Exception as e:
+            name = source if isinstance(source, str) else "<buffer>"
+            print(f"Error decoding {name}: {e}")
+            return source, None
+
+    def close(self) -> None:
+        """
+        Shuts down the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "ImageDecoder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
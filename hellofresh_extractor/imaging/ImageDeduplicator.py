@@ -0,0 +1,256 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Computes the difference hash of an image: whether each pixel of a small grayscale
+    thumbnail is brighter than its right-hand neighbour.
+
+    Args:
+        image (Image.Image): The image to hash.
+        hash_size (int, optional): The hash is hash_size * hash_size bits. Defaults to 8.
+
+    Returns:
+        int: The hash.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.float32)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image: Image.Image, hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """
+    Computes the perceptual hash of an image: whether each low-frequency DCT coefficient
+    of a grayscale thumbnail is above the median coefficient.
+
+    Args:
+        image (Image.Image): The image to hash.
+        hash_size (int, optional): The hash is hash_size * hash_size bits. Defaults to 8.
+        highfreq_factor (int, optional): Thumbnail size as a multiple of hash_size. Defaults to 4.
+
+    Returns:
+        int: The hash.
+    """
+    size = hash_size * highfreq_factor
+    small = image.convert("L").resize((size, size), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.float64)
+
+    # Orthonormal DCT-II basis, applied along both axes
+    n = np.arange(size)
+    basis = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    basis[0] /= np.sqrt(2)
+    dct = basis @ pixels @ basis.T
+
+    low_freq = dct[:hash_size, :hash_size]
+    return _bits_to_int(low_freq > np.median(low_freq))
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """
+    Returns the number of differing bits between two hashes.
+    """
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """
+    A BK-tree over integer hashes, for finding all hashes within a Hamming distance of a query
+    without comparing against every stored hash.
+    """
+
+    def __init__(self) -> None:
+        # Each node is [hash, key, {distance: child node}]
+        self._root: Optional[list] = None
+
+    def add(self, hash_value: int, key: Hashable) -> None:
+        """
+        Adds a hash, labelled with a key.
+        """
+        node = [hash_value, key, {}]
+        if self._root is None:
+            self._root = node
+            return
+
+        current = self._root
+        while True:
+            distance = hamming_distance(hash_value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[int, Hashable]]:
+        """
+        Finds all stored hashes within max_distance of a hash.
+
+        Returns:
+            List[Tuple[int, Hashable]]: (distance, key) for each match.
+        """
+        if self._root is None:
+            return []
+
+        matches = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                matches.append((distance, node[1]))
+            # By the triangle inequality only children in this band can match
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return matches
+
+
+class ImageDeduplicator:
+    """
+    Groups near-duplicate photos (retakes, bursts, re-shot cards) by perceptual hash, so that
+    only one representative per group needs to go through LLM extraction.
+
+    Images are hashed one at a time as they arrive, and only hashes and keys are kept, so
+    a large batch never has to be held in memory.
+
+    Example usage:
+    deduplicator = ImageDeduplicator(max_distance=6)
+    results = deduplicator.run(
+        decoder.decode(images),
+        lambda image: gemini_caller.invoke(
+            system_message=multimodal_system_prompt,
+            input_content=[image, multimodal_user_query],
+            output_schema=ExtractedMeal,
+        ),
+    )
+
+    Attributes:
+        max_distance (int): The maximum Hamming distance between hashes of duplicate images.
+        hash_function (Callable[[Image.Image], int]): The perceptual hash function.
+    """
+
+    HASH_FUNCTIONS = {"phash": phash, "dhash": dhash}
+
+    def __init__(self, max_distance: int = 6, hash_function: str = "phash") -> None:
+        """
+        Initializes the deduplicator.
+
+        Args:
+            max_distance (int, optional): The maximum Hamming distance (out of 64 bits) between
+                hashes of duplicate images. Defaults to 6.
+            hash_function (str, optional): Either "phash" or "dhash". Defaults to "phash".
+        """
+        if hash_function not in self.HASH_FUNCTIONS:
+            raise NotImplementedError("Only supports hash_function='phash' or 'dhash'")
+        self.max_distance = max_distance
+        self.hash_function = self.HASH_FUNCTIONS[hash_function]
+
+    def _assign(
+        self,
+        images: Iterable[Tuple[Hashable, Optional[Image.Image]]],
+        clusters: Dict[Hashable, List[Hashable]],
+    ) -> Iterator[Tuple[Hashable, Image.Image]]:
+        """
+        Hashes each image and adds it to clusters, yielding the images that start a new cluster.
+        Images that failed to decode (None, as yielded by ImageDecoder.decode) are skipped.
+        """
+        tree = BKTree()
+        for key, image in images:
+            if image is None:
+                print(f"Skipping {key}: image could not be decoded")
+                continue
+            hash_value = self.hash_function(image)
+            matches = tree.search(hash_value, self.max_distance)
+            if matches:
+                _, representative = min(matches, key=lambda match: match[0])
+                clusters[representative].append(key)
+            else:
+                tree.add(hash_value, key)
+                clusters[key] = [key]
+                yield key, image
+
+    def cluster(
+        self, images: Iterable[Tuple[Hashable, Optional[Image.Image]]]
+    ) -> Dict[Hashable, List[Hashable]]:
+        """
+        Groups images into clusters of near-duplicates.
+
+        Each image joins the cluster of the nearest representative within max_distance, or
+        starts a new cluster if there is none, so the representative of a cluster is its first
+        member. Images that failed to decode (None) are skipped and belong to no cluster.
+
+        Args:
+            images (Iterable[Tuple[Hashable, Optional[Image.Image]]]): (key, image) pairs,
+                keyed by e.g. their file path, such as the output of ImageDecoder.decode.
+
+        Returns:
+            Dict[Hashable, List[Hashable]]: The members of each cluster (including the
+                representative itself), keyed by representative.
+        """
+        clusters: Dict[Hashable, List[Hashable]] = {}
+        for _ in self._assign(images, clusters):
+            pass
+        return clusters
+
+    @staticmethod
+    def fan_out(
+        clusters: Dict[Hashable, List[Hashable]], results: Dict[Hashable, Any]
+    ) -> Dict[Hashable, Any]:
+        """
+        Copies each representative's result to every member of its cluster.
+
+        Args:
+            clusters (Dict[Hashable, List[Hashable]]): Clusters, as returned by cluster.
+            results (Dict[Hashable, Any]): Results keyed by representative.
+
+        Returns:
+            Dict[Hashable, Any]: Results keyed by every image key. Members of a cluster whose
+                representative has no result are left out.
+        """
+        return {
+            member: results[representative]
+            for representative, members in clusters.items()
+            if representative in results
+            for member in members
+        }
+
+    def run(
+        self,
+        images: Iterable[Tuple[Hashable, Optional[Image.Image]]],
+        extract: Callable[[Image.Image], Any],
+    ) -> Dict[Hashable, Any]:
+        """
+        Clusters the images, extracts from one representative per cluster and fans the
+        results back out to all images.
+
+        A representative is extracted as soon as it arrives, since it is the first member of
+        its cluster. If its extraction fails, the error is printed and its cluster is left out.
+        Images that failed to decode are skipped.
+
+        Args:
+            images (Iterable[Tuple[Hashable, Optional[Image.Image]]]): (key, image) pairs,
+                keyed by e.g. their file path, such as the output of ImageDecoder.decode.
+            extract (Callable[[Image.Image], Any]): The extraction to run on each representative.
+
+        Returns:
+            Dict[Hashable, Any]: The extraction result for every decoded image key.
+        """
+        clusters: Dict[Hashable, List[Hashable]] = {}
+        results: Dict[Hashable, Any] = {}
+        for representative, image in self._assign(images, clusters):
+            try:
+                results[representative] = extract(image)
+            except Exception as e:
+                print(f"Error extracting from {representative}: {e}")
+
+        n_images = sum(len(members) for members in clusters.values())
+        print(f"Extracted {len(clusters)} unique images out of {n_images}")
+        return self.fan_out(clusters, results)
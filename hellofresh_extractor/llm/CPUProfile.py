@@ -0,0 +1,189 @@
+import os
+from typing import Any, Dict, Optional
+
+
+class CPUProfile:
+    """
+    Settings for running the local pipeline (MultiModalModel and the outlines model behind
+    StructuredOutputModel) on CPU-only machines.
+
+    A profile controls:
+    - int8 dynamic quantization of the Linear layers, which shrinks the weights and speeds up
+      the matrix multiplications that dominate decoding. Weights are loaded as float32 first,
+      because dynamic quantization needs float weights.
+    - the split between intra-op threads (parallelism inside one matmul) and inter-op threads
+      (independent ops run side by side).
+    - optional torch.compile of the model's forward pass.
+    - memory-mapped weight loading, so safetensors weights are read from the page cache
+      instead of being copied into a second buffer. The weights stay memory-mapped only when
+      torch_dtype matches the checkpoint (bfloat16 for Gemma 3 and SmolLM2) and no
+      quantization is applied.
+
+    Use benchmarks/cpu_inference.py to compare profiles on a given machine.
+
+    Example usage:
+    profile = CPU_PROFILES["int8"]
+    multimodal_model_caller = MultiModalModel(
+        model_pipe=profile.multimodal_pipeline("google/gemma-3-4b-it", token=os.environ.get("HF_TOKEN"))
+    )
+    structured_model_caller = StructuredOutputModel(
+        model=profile.outlines_model("HuggingFaceTB/SmolLM2-1.7B-Instruct"), outputmodel=ExtractedMeal
+    )
+
+    Attributes:
+        name (str): The name shown in benchmark reports.
+        quantize (bool): Whether to apply int8 dynamic quantization to Linear layers.
+        intra_op_threads (int): Threads used inside one op.
+        inter_op_threads (int): Threads used to run independent ops in parallel.
+        compile (bool): Whether to wrap the forward pass in torch.compile.
+        mmap_weights (bool): Whether to load weights memory-mapped, without an extra copy.
+        torch_dtype (str): The dtype to load the weights in, "float32" or "bfloat16".
+    """
+
+    def __init__(
+        self,
+        name: str = "baseline",
+        quantize: bool = False,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: int = 1,
+        compile: bool = False,
+        mmap_weights: bool = True,
+        torch_dtype: str = "float32",
+    ) -> None:
+        """
+        Initializes the profile.
+
+        Args:
+            name (str, optional): The name shown in benchmark reports. Defaults to "baseline".
+            quantize (bool, optional): Apply int8 dynamic quantization to Linear layers. Defaults to False.
+            intra_op_threads (Optional[int]): Threads used inside one op. Defaults to the number of CPUs.
+            inter_op_threads (int, optional): Threads used to run independent ops in parallel. Defaults to 1.
+            compile (bool, optional): Wrap the forward pass in torch.compile. Defaults to False.
+            mmap_weights (bool, optional): Load weights memory-mapped. Defaults to True.
+            torch_dtype (str, optional): "float32" or "bfloat16". Defaults to "float32".
+        """
+        if quantize and torch_dtype != "float32":
+            raise ValueError("int8 dynamic quantization needs torch_dtype='float32'")
+
+        self.name = name
+        self.quantize = quantize
+        self.intra_op_threads = intra_op_threads or os.cpu_count() or 1
+        self.inter_op_threads = inter_op_threads
+        self.compile = compile
+        self.mmap_weights = mmap_weights
+        self.torch_dtype = torch_dtype
+
+    def apply_threads(self) -> None:
+        """
+        Sets torch's intra-op and inter-op thread counts for this process.
+
+        The inter-op count can only be set before torch runs its first parallel op, so it is
+        left unchanged (with a message) if that has already happened.
+        """
+        import torch
+
+        torch.set_num_threads(self.intra_op_threads)
+        try:
+            torch.set_num_interop_threads(self.inter_op_threads)
+        except RuntimeError as e:
+            print(
+                f"Could not set inter-op threads, keeping {torch.get_num_interop_threads()}: {e}"
+            )
+
+    def model_kwargs(self) -> Dict[str, Any]:
+        """
+        Returns the from_pretrained keyword arguments for this profile.
+
+        Returns:
+            Dict[str, Any]: The keyword arguments.
+        """
+        import torch
+
+        return {
+            "torch_dtype": getattr(torch, self.torch_dtype),
+            # Loads safetensors shards lazily from their memory map instead of first
+            # materializing a randomly initialized model and copying the weights into it
+            "low_cpu_mem_usage": self.mmap_weights,
+            "use_safetensors": self.mmap_weights or None,
+        }
+
+    def optimize(self, model: Any) -> Any:
+        """
+        Applies the profile's quantization and compilation to a loaded transformers model, in place.
+
+        Args:
+            model (Any): The transformers model.
+
+        Returns:
+            Any: The same model.
+        """
+        import torch
+
+        model.eval()
+        if self.quantize:
+            torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+        if self.compile:
+            # generate calls the module, which calls forward, so compiling forward is enough
+            model.forward = torch.compile(model.forward, dynamic=True)
+        return model
+
+    def multimodal_pipeline(self, model_name: str, **pipeline_kwargs: Any) -> Any:
+        """
+        Loads an image-text-to-text pipeline for MultiModalModel with this profile.
+
+        Args:
+            model_name (str): The Hugging Face model, e.g. "google/gemma-3-4b-it".
+            **pipeline_kwargs: Passed on to transformers.pipeline, e.g. token.
+
+        Returns:
+            Any: The pipeline.
+        """
+        from transformers import pipeline
+
+        self.apply_threads()
+        model_kwargs = self.model_kwargs()
+        pipeline_kwargs.setdefault("use_fast", True)
+        multimodal_pipe = pipeline(
+            "image-text-to-text",
+            model=model_name,
+            device="cpu",
+            torch_dtype=model_kwargs.pop("torch_dtype"),
+            model_kwargs=model_kwargs,
+            **pipeline_kwargs,
+        )
+        self.optimize(multimodal_pipe.model)
+        return multimodal_pipe
+
+    def outlines_model(
+        self, model_name: str, model_kwargs: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Loads an outlines transformers model for StructuredOutputModel with this profile.
+
+        Args:
+            model_name (str): The Hugging Face model, e.g. "HuggingFaceTB/SmolLM2-1.7B-Instruct".
+            model_kwargs (Optional[Dict[str, Any]]): Extra from_pretrained keyword arguments.
+
+        Returns:
+            Any: The outlines model.
+        """
+        import outlines
+
+        self.apply_threads()
+        structured_model = outlines.models.transformers(
+            model_name,
+            device="cpu",
+            model_kwargs={**self.model_kwargs(), **(model_kwargs or {})},
+        )
+        self.optimize(structured_model.model)
+        return structured_model
+
+
+CPU_PROFILES = {
+    "baseline": CPUProfile("baseline"),
+    "bfloat16": CPUProfile("bfloat16", torch_dtype="bfloat16"),
+    "int8": CPUProfile("int8", quantize=True),
+    "int8-compiled": CPUProfile("int8-compiled", quantize=True, compile=True),
+}
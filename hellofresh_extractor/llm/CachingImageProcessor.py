@@ -0,0 +1,80 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from copy import copy
+from typing import Any
+from PIL import Image
+
+
+class CachingImageProcessor:
+    """
+    Wraps a transformers image processor so repeated calls on the same images reuse the pixel
+    tensors computed the first time.
+
+    The pipeline copies every image before preprocessing it, so entries are keyed by a hash of
+    the image contents rather than by object identity. Any other attribute is forwarded to the
+    wrapped processor, so the wrapper can replace processor.image_processor in place.
+
+    Example usage:
+    processor = multimodal_pipe.processor
+    processor.image_processor = CachingImageProcessor(processor.image_processor, max_entries=16)
+
+    Attributes:
+        image_processor (Any): The wrapped image processor.
+        max_entries (int): The maximum number of cached results.
+        hits (int): Number of calls served from the cache.
+        misses (int): Number of calls that ran the wrapped processor.
+    """
+
+    def __init__(self, image_processor: Any, max_entries: int = 16) -> None:
+        self.image_processor = image_processor
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes the wrapper does not have itself
+        if name == "image_processor":
+            raise AttributeError(name)
+        return getattr(self.image_processor, name)
+
+    @staticmethod
+    def _update_digest(digest: Any, images: Any) -> None:
+        # The nesting is hashed as well as the pixels, e.g. one prompt with two images is not
+        # the same as two prompts with one image each
+        if isinstance(images, (list, tuple)):
+            digest.update(b"[")
+            for item in images:
+                CachingImageProcessor._update_digest(digest, item)
+            digest.update(b"]")
+        elif isinstance(images, Image.Image):
+            digest.update(f"{images.mode}{images.size}".encode("utf-8"))
+            digest.update(images.tobytes())
+        else:
+            digest.update(repr(getattr(images, "shape", None)).encode("utf-8"))
+            digest.update(memoryview(images).tobytes())
+
+    def _make_key(self, images: Any, kwargs: dict) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(sorted(kwargs.items())).encode("utf-8"))
+        self._update_digest(digest, images)
+        return digest.hexdigest()
+
+    def __call__(self, images: Any, **kwargs: Any) -> Any:
+        key = self._make_key(images, kwargs)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                # The processor pops entries from the result, so callers get a shallow copy
+                return copy(self._cache[key])
+
+        result = self.image_processor(images, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = result
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return copy(result)
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "hellofresh_extractor", "embeddings"
+)
+
+
+class EmbeddingStore:
+    """
+    A persistent store of text embeddings, keyed by (model, task_type, text hash).
+
+    Each (model, task_type) pair gets its own directory holding a flat float32 vector file,
+    which is read back through a memory map, and a small SQLite index mapping text hashes
+    to rows in that file. Vectors are only ever appended, so rows never move.
+
+    Example usage:
+    store = EmbeddingStore()
+    embedder = GeminiEmbeddings(api_key=api_key, model="text-embedding-004", store=store)
+    matrix = embedder.embed_array(ingredient_names)
+
+    Attributes:
+        directory (str): The root directory of the store.
+    """
+
+    def __init__(self, directory: str = DEFAULT_STORE_PATH) -> None:
+        """
+        Opens (or creates) the store.
+
+        Args:
+            directory (str, optional): The root directory of the store. Defaults to ~/.cache/hellofresh_extractor/embeddings.
+        """
+        self.directory = directory
+        self._namespaces: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """
+        Returns the hash used to key a text in the store.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _namespace(self, model: str, task_type: str) -> Dict:
+        """
+        Returns the open index and vector file state for a (model, task_type) pair.
+        """
+        name = hashlib.sha256(f"{model}\0{task_type}".encode("utf-8")).hexdigest()[:16]
+        if name in self._namespaces:
+            return self._namespaces[name]
+
+        path = os.path.join(self.directory, name)
+        os.makedirs(path, exist_ok=True)
+        connection = sqlite3.connect(
+            os.path.join(path, "index.sqlite"), check_same_thread=False
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (text_hash TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+            [("model", model), ("task_type", task_type)],
+        )
+        connection.commit()
+
+        dim = connection.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        namespace = {
+            "connection": connection,
+            "vectors_path": os.path.join(path, "vectors.f32"),
+            "dim": int(dim[0]) if dim else None,
+            "memmap": None,
+        }
+        self._namespaces[name] = namespace
+        return namespace
+
+    def _rows_in_file(self, namespace: Dict) -> int:
+        if namespace["dim"] is None or not os.path.exists(namespace["vectors_path"]):
+            return 0
+        row_bytes = namespace["dim"] * np.dtype(np.float32).itemsize
+        return os.path.getsize(namespace["vectors_path"]) // row_bytes
+
+    def _vectors(self, namespace: Dict) -> Optional[np.ndarray]:
+        """
+        Returns a read-only memory map over all stored vectors, re-mapping if the file has grown.
+        """
+        n_rows = self._rows_in_file(namespace)
+        if n_rows == 0:
+            return None
+        memmap = namespace["memmap"]
+        if memmap is None or memmap.shape[0] != n_rows:
+            memmap = np.memmap(
+                namespace["vectors_path"],
+                dtype=np.float32,
+                mode="r",
+                shape=(n_rows, namespace["dim"]),
+            )
+            namespace["memmap"] = memmap
+        return memmap
+
+    @staticmethod
+    def _find_rows(
+        connection: sqlite3.Connection, text_hashes: Sequence[str]
+    ) -> Dict[str, int]:
+        """
+        Returns the vector file row of each stored hash.
+        """
+        rows: Dict[str, int] = {}
+        hashes = list(text_hashes)
+        # Stay below SQLite's limit on the number of bound parameters
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(
+                connection.execute(
+                    f"SELECT text_hash, row FROM entries WHERE text_hash IN ({placeholders})",
+                    chunk,
+                )
+            )
+        return rows
+
+    def lookup(
+        self, model: str, task_type: str, text_hashes: Sequence[str]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Looks up stored embeddings.
+
+        Args:
+            model (str): The embedding model name.
+            task_type (str): The embedding task type.
+            text_hashes (Sequence[str]): Hashes of the texts to look up, from text_hash.
+
+        Returns:
+            Dict[str, np.ndarray]: The stored vector for each hash that was found.
+        """
+        with self._lock:
+            namespace = self._namespace(model, task_type)
+            rows = self._find_rows(namespace["connection"], text_hashes)
+            if not rows:
+                return {}
+
+            vectors = self._vectors(namespace)
+            found = list(rows.items())
+            matrix = np.asarray(vectors[[row for _, row in found]])
+
+        return {text_hash: matrix[i] for i, (text_hash, _) in enumerate(found)}
+
+    def add(
+        self,
+        model: str,
+        task_type: str,
+        text_hashes: Sequence[str],
+        vectors: np.ndarray,
+    ) -> None:
+        """
+        Appends embeddings to the store. Hashes that are already stored are skipped.
+
+        Args:
+            model (str): The embedding model name.
+            task_type (str): The embedding task type.
+            text_hashes (Sequence[str]): Hashes of the embedded texts, from text_hash.
+            vectors (np.ndarray): The embeddings, one row per hash.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(text_hashes) == 0:
+            return
+
+        with self._lock:
+            namespace = self._namespace(model, task_type)
+            connection = namespace["connection"]
+            if namespace["dim"] is None:
+                namespace["dim"] = vectors.shape[1]
+                connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)",
+                    (str(vectors.shape[1]),),
+                )
+            elif vectors.shape[1] != namespace["dim"]:
+                raise ValueError(
+                    f"Expected vectors of dimension {namespace['dim']}, got {vectors.shape[1]}"
+                )
+
+            existing = set(self._find_rows(connection, text_hashes))
+            new_rows: List[int] = []
+            new_hashes: List[str] = []
+            for i, text_hash in enumerate(text_hashes):
+                if text_hash not in existing:
+                    existing.add(text_hash)
+                    new_rows.append(i)
+                    new_hashes.append(text_hash)
+            if not new_rows:
+                connection.commit()
+                return
+
+            # Write the vectors before indexing them, so the index never points past the file
+            first_row = self._rows_in_file(namespace)
+            with open(namespace["vectors_path"], "ab") as f:
+                # Drop a partial row left by an interrupted write, so the new rows start at first_row
+                f.truncate(first_row * vectors.shape[1] * vectors.itemsize)
+                f.write(vectors[new_rows].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            connection.executemany(
+                "INSERT INTO entries (text_hash, row) VALUES (?, ?)",
+                [(text_hash, first_row + i) for i, text_hash in enumerate(new_hashes)],
+            )
+            connection.commit()
+
+    def close(self) -> None:
+        """
+        Closes all open indexes.
+        """
+        with self._lock:
+            for namespace in self._namespaces.values():
+                namespace["connection"].close()
+            self._namespaces = {}
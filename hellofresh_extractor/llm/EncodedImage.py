@@ -0,0 +1,147 @@
+import base64
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+class EncodedImage:
+    """
+    A PIL image encoded once for sending to an LLM API.
+
+    The encoded bytes and their base64 form are computed lazily on first use and then reused
+    for size checks, inline payloads, File API uploads and cache keys. Use from_image to share
+    one encoding when the same PIL image is passed to several callers.
+
+    Example usage:
+    encoded = EncodedImage.from_image(image)
+    if encoded.size < 20 * 1024 * 1024:
+        part = encoded.to_gemini_inline()
+
+    Attributes:
+        image (Image.Image): The source image. It should not be modified after encoding.
+        format (str): The format the image is encoded in, e.g. "JPEG".
+    """
+
+    MAX_CACHED = 8
+
+    # Maps (id(image), format) to (weakref to the image, encoded bytes). Only the bytes are
+    # kept, so the cache never keeps an image alive
+    _cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, image: "Image.Image", image_format: Optional[str] = None) -> None:
+        """
+        Wraps an image for encoding. No encoding happens until the bytes are needed.
+
+        Args:
+            image (Image.Image): The PIL image to encode.
+            image_format (Optional[str]): The output format. Defaults to the image's own format, or JPEG.
+        """
+        self.image = image
+        self.format = (image_format or image.format or "JPEG").upper()
+        self._data: Optional[bytes] = None
+        self._base64: Optional[str] = None
+        self._lock = threading.Lock()
+        self._shared = False
+
+    @classmethod
+    def from_image(
+        cls, image: "Image.Image", image_format: Optional[str] = None
+    ) -> "EncodedImage":
+        """
+        Returns an EncodedImage for an image, reusing the bytes of a recent encoding of the
+        same image object.
+
+        Args:
+            image (Image.Image): The PIL image to encode.
+            image_format (Optional[str]): The output format. Defaults to the image's own format, or JPEG.
+
+        Returns:
+            EncodedImage: The encoded image.
+        """
+        image_format = (image_format or image.format or "JPEG").upper()
+        key = (id(image), image_format)
+
+        with cls._cache_lock:
+            entry = cls._cache.get(key)
+            # id() values are reused once an image is garbage collected, so check the weakref too
+            if entry is not None and entry[0]() is image:
+                cls._cache.move_to_end(key)
+                data = entry[1]
+            else:
+                data = None
+
+        encoded = cls(image, image_format)
+        encoded._data = data
+        # Share the bytes with later calls once they are encoded
+        encoded._shared = data is None
+        return encoded
+
+    @classmethod
+    def _remember(cls, image: "Image.Image", image_format: str, data: bytes) -> None:
+        with cls._cache_lock:
+            cls._cache[(id(image), image_format)] = (weakref.ref(image), data)
+            while len(cls._cache) > cls.MAX_CACHED:
+                cls._cache.popitem(last=False)
+
+    @property
+    def data(self) -> bytes:
+        """
+        The encoded image bytes.
+        """
+        with self._lock:
+            if self._data is None:
+                from io import BytesIO
+
+                buffer = BytesIO()
+                self.image.save(buffer, format=self.format)
+                self._data = buffer.getvalue()
+                if self._shared:
+                    self._remember(self.image, self.format, self._data)
+        return self._data
+
+    @property
+    def base64(self) -> str:
+        """
+        The encoded image bytes as a base64 string.
+        """
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode("utf-8")
+        return self._base64
+
+    @property
+    def size(self) -> int:
+        """
+        The size of the encoded image in bytes.
+        """
+        return len(self.data)
+
+    @property
+    def mime_type(self) -> str:
+        """
+        The MIME type of the encoded image, e.g. "image/jpeg".
+        """
+        return f"image/{self.format.lower()}"
+
+    def to_gemini_inline(self) -> Dict[str, Any]:
+        """
+        Returns the image as a Gemini inline data part.
+        """
+        return {"inlineData": {"mimeType": self.mime_type, "data": self.base64}}
+
+    def to_claude_block(self) -> Dict[str, Any]:
+        """
+        Returns the image as a Claude base64 image content block.
+        """
+        return {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": self.mime_type,
+                "data": self.base64,
+            },
+        }
@@ -1,50 +1,114 @@
-from google import genai
-from google.genai import types
+import asyncio
+import math
+import numpy as np
+from hellofresh_extractor.llm.EmbeddingStore import EmbeddingStore
+from hellofresh_extractor.llm.utils import run_coroutine_sync
 
 
 class GeminiEmbeddings:
     MAX_TOKENS = 7500
+    MAX_BATCH_SIZE = 100
+    # Conservative estimate: real text averages ~4 bytes per token, so this overcounts
+    BYTES_PER_TOKEN = 3
 
-    def __init__(self, api_key, model, task_type="SEMANTIC_SIMILARITY"):
+    def __init__(
+        self,
+        api_key,
+        model,
+        task_type="SEMANTIC_SIMILARITY",
+        max_concurrency=4,
+        store=None,
+    ):
         self.api_key = api_key
         self.model_name = model
         self.task_type = task_type
+        self.max_concurrency = max_concurrency
+        # Optional EmbeddingStore used by embed_array to avoid re-embedding texts
+        self.store = store
+        from google import genai
+
         self.client = genai.Client(api_key=api_key)
 
-    def _count_tokens(self, texts):
-        # Count tokens for the batch of texts
-        return self.client.models.count_tokens(
-            model="gemini-2.5-flash-preview-04-17", contents=texts
-        )
+    @classmethod
+    def _estimate_tokens(cls, text):
+        # Local upper-bound estimate, avoiding a count_tokens request per text
+        return max(1, math.ceil(len(text.encode("utf-8")) / cls.BYTES_PER_TOKEN))
 
-    def embed_list(self, text_to_embed):
-        result = []
-        # Simple batching: split into chunks if needed
+    def _make_batches(self, text_to_embed):
+        batches = []
         batch = []
         tokens_in_batch = 0
 
         for text in text_to_embed:
-            tokens = self._count_tokens([text])
-            if tokens_in_batch + tokens.total_tokens > self.MAX_TOKENS and batch:
-                # Embed current batch
-                embeddings = self.client.models.embed_content(
-                    model=self.model_name,
-                    contents=batch,
-                    config=types.EmbedContentConfig(task_type=self.task_type),
-                )
-                result.extend([x.values for x in embeddings.embeddings])
+            tokens = self._estimate_tokens(text)
+            if batch and (
+                tokens_in_batch + tokens > self.MAX_TOKENS
+                or len(batch) >= self.MAX_BATCH_SIZE
+            ):
+                batches.append(batch)
                 batch = []
                 tokens_in_batch = 0
             batch.append(text)
-            tokens_in_batch += tokens.total_tokens
+            tokens_in_batch += tokens
 
-        # Embed any remaining texts
         if batch:
-            embeddings = self.client.models.embed_content(
-                model=self.model_name,
-                contents=batch,
-                config=types.EmbedContentConfig(task_type=self.task_type),
-            )
-            result.extend([x.values for x in embeddings.embeddings])
+            batches.append(batch)
+        return batches
+
+    async def _aembed_batches(self, batches):
+        from google.genai import types
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed_batch(batch):
+            async with semaphore:
+                embeddings = await self.client.aio.models.embed_content(
+                    model=self.model_name,
+                    contents=batch,
+                    config=types.EmbedContentConfig(task_type=self.task_type),
+                )
+            return [x.values for x in embeddings.embeddings]
 
+        return await asyncio.gather(*(embed_batch(batch) for batch in batches))
+
+    def embed_list(self, text_to_embed):
+        # Independent batches are embedded concurrently, results keep the input order
+        batches = self._make_batches(text_to_embed)
+        batch_results = run_coroutine_sync(self._aembed_batches(batches))
+
+        result = []
+        for embeddings in batch_results:
+            result.extend(embeddings)
         return result
+
+    def embed_array(self, text_to_embed):
+        """
+        Embeds texts and returns a contiguous float32 matrix with one row per text.
+
+        Duplicate texts are only embedded once, and texts already in the store are
+        loaded from it instead of calling the API.
+        """
+        hashes = [EmbeddingStore.text_hash(text) for text in text_to_embed]
+        unique_texts = dict(zip(hashes, text_to_embed))
+
+        vectors = {}
+        if self.store:
+            vectors = self.store.lookup(
+                self.model_name, self.task_type, list(unique_texts)
+            )
+
+        missing = [text_hash for text_hash in unique_texts if text_hash not in vectors]
+        if missing:
+            new_vectors = np.asarray(
+                self.embed_list([unique_texts[text_hash] for text_hash in missing]),
+                dtype=np.float32,
+            )
+            if self.store:
+                self.store.add(self.model_name, self.task_type, missing, new_vectors)
+            vectors.update(zip(missing, new_vectors))
+
+        if not hashes:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(
+            np.stack([vectors[text_hash] for text_hash in hashes]), dtype=np.float32
+        )
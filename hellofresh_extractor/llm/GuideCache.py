@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import weakref
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, Tuple, Type
+from pydantic import BaseModel
+
+DEFAULT_GUIDE_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "hellofresh_extractor", "guides"
+)
+
+
+def _package_version(package: str) -> str:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class GuideCache:
+    """
+    A cache for the guides (token-level state machines) that outlines compiles from a JSON schema.
+
+    Built guides are kept in memory, so every request in a process reuses the same guide object
+    instead of rebuilding it through RegexGuide.from_regex. The compiled states mapping is also
+    stored on disk under a key made of the schema's regular expression, a fingerprint of the
+    tokenizer's vocabulary and the outlines versions, so new processes load it instead of
+    walking the vocabulary again. The fingerprint is computed once per tokenizer object.
+
+    Example usage:
+    guide_cache = GuideCache()
+    structured_model_caller = StructuredOutputModel(
+        model=structured_model, outputmodel=ExtractedMeal, guide_cache=guide_cache
+    )
+
+    Attributes:
+        cache_dir (str): The directory holding one pickle file per compiled guide.
+        hits (int): Number of guides loaded from disk.
+        misses (int): Number of guides that had to be compiled.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_GUIDE_CACHE_DIR) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str, optional): Where compiled guides are stored. Defaults to ~/.cache/hellofresh_extractor/guides.
+        """
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._guides: Dict[str, Any] = {}
+        # Maps id(tokenizer) to (weakref to the tokenizer, fingerprint)
+        self._fingerprints: Dict[int, Tuple[Any, str]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def tokenizer_fingerprint(self, tokenizer: Any) -> str:
+        """
+        Returns a hash identifying everything about an outlines tokenizer that the compiled guide
+        depends on. Hashing the vocabulary is slow, so the result is remembered per tokenizer object.
+
+        Args:
+            tokenizer (Any): An outlines tokenizer, e.g. model.tokenizer of an outlines model.
+
+        Returns:
+            str: The hex digest.
+        """
+        with self._lock:
+            entry = self._fingerprints.get(id(tokenizer))
+        # id() values are reused once a tokenizer is garbage collected, so check the weakref too
+        if entry is not None and entry[0]() is tokenizer:
+            return entry[1]
+
+        identity = {
+            "class": type(tokenizer).__name__,
+            "name": getattr(getattr(tokenizer, "tokenizer", None), "name_or_path", ""),
+            "vocabulary": sorted(tokenizer.vocabulary.items()),
+            "eos_token_id": tokenizer.eos_token_id,
+            "special_tokens": sorted(tokenizer.special_tokens),
+        }
+        fingerprint = hashlib.sha256(
+            json.dumps(identity, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            self._fingerprints[id(tokenizer)] = (weakref.ref(tokenizer), fingerprint)
+        return fingerprint
+
+    def make_key(self, regex_string: str, tokenizer: Any) -> str:
+        """
+        Creates the cache key for a guide.
+
+        Args:
+            regex_string (str): The regular expression built from the JSON schema.
+            tokenizer (Any): The outlines tokenizer the guide is compiled for.
+
+        Returns:
+            str: The hex digest used as the file name.
+        """
+        payload = {
+            "regex": regex_string,
+            "tokenizer": self.tokenizer_fingerprint(tokenizer),
+            "outlines": _package_version("outlines"),
+            "outlines_core": _package_version("outlines_core"),
+        }
+        return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+    def _states_mapping_loader(self, key: str):
+        """
+        Wraps outlines' create_states_mapping so its result is read from, or written to, disk.
+        """
+        from outlines_core.fsm.guide import create_states_mapping
+
+        path = os.path.join(self.cache_dir, f"{key}.pkl")
+
+        def cached_create_states_mapping(regex_string, tokenizer, *args, **kwargs):
+            if os.path.exists(path):
+                try:
+                    with open(path, "rb") as f:
+                        states_mapping = pickle.load(f)
+                    self.hits += 1
+                    return states_mapping
+                except (OSError, pickle.UnpicklingError, EOFError) as e:
+                    print(f"Ignoring unreadable guide cache entry {path}: {e}")
+
+            self.misses += 1
+            states_mapping = create_states_mapping(
+                regex_string, tokenizer, *args, **kwargs
+            )
+            # Write to a temporary file first so a concurrent reader never sees a partial file
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                pickle.dump(states_mapping, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+            return states_mapping
+
+        return cached_create_states_mapping
+
+    def regex_guide(self, regex_string: str, tokenizer: Any) -> Any:
+        """
+        Returns the guide for a regular expression, reusing one built earlier in this process,
+        and compiling it only if it is not on disk either.
+
+        Args:
+            regex_string (str): The regular expression the output must follow.
+            tokenizer (Any): The outlines tokenizer the guide is compiled for.
+
+        Returns:
+            RegexGuide: The guide.
+        """
+        from outlines_core.fsm.guide import RegexGuide
+
+        key = self.make_key(regex_string, tokenizer)
+        with self._lock:
+            guide = self._guides.get(key)
+        if guide is None:
+            guide = RegexGuide.from_regex(
+                regex_string,
+                tokenizer,
+                _create_states_mapping=self._states_mapping_loader(key),
+            )
+            with self._lock:
+                guide = self._guides.setdefault(key, guide)
+        return guide
+
+    def json_logits_processor(self, output_model: Type[BaseModel], tokenizer: Any) -> Any:
+        """
+        Returns an outlines logits processor that constrains generation to a JSON schema,
+        equivalent to outlines' JSONLogitsProcessor but built from the cached guide.
+
+        Args:
+            output_model (Type[BaseModel]): The pydantic model describing the output.
+            tokenizer (Any): The outlines tokenizer the guide is compiled for.
+
+        Returns:
+            GuideLogitsProcessor: The logits processor.
+        """
+        from outlines.processors import GuideLogitsProcessor
+        from outlines_core.fsm.json_schema import build_regex_from_schema
+
+        regex_string = build_regex_from_schema(
+            json.dumps(output_model.model_json_schema())
+        )
+        guide = self.regex_guide(regex_string, tokenizer)
+        return GuideLogitsProcessor(tokenizer=tokenizer, guide=guide)
+
+    def clear(self) -> None:
+        """
+        Removes every compiled guide from the cache.
+        """
+        with self._lock:
+            self._guides.clear()
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".pkl"):
+                os.remove(os.path.join(self.cache_dir, file_name))
@@ -1,20 +1,331 @@
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+import numpy as np
+from pydantic import BaseModel
+from PIL import Image
+from hellofresh_extractor.llm.CachingImageProcessor import CachingImageProcessor
+
+
 class MultiModalModel:
-    def __init__(self, model_pipe):
+    # Gemma 3 encodes every image as a fixed number of soft tokens, whatever its size
+    IMAGE_TOKENS = 256
+    # Rough estimate, only used to group prompts of similar length
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model_pipe, guide_cache=None, image_cache_size=0):
         self.multimodal_pipe = model_pipe
+        # Optional GuideCache, used when compiling JSON guides for invoke_structured
+        self.guide_cache = guide_cache
+        self._json_processors = {}
 
-    def invoke(self, system_message, user_messages, max_tokens=1000, temperature=0.1):
-        input_messages = [
+        # With image_cache_size > 0, prepared images and their pixel tensors are reused when
+        # the same image is passed again
+        self.image_cache_size = image_cache_size
+        self._prepared_images = OrderedDict()
+        processor = getattr(model_pipe, "processor", None)
+        if image_cache_size > 0 and processor is not None:
+            processor.image_processor = CachingImageProcessor(
+                processor.image_processor, max_entries=image_cache_size
+            )
+
+    def _target_size(self):
+        processor = getattr(self.multimodal_pipe, "processor", None)
+        image_processor = getattr(processor, "image_processor", None)
+        size = getattr(image_processor, "size", None) or {}
+        if "height" in size and "width" in size:
+            resample = getattr(image_processor, "resample", None)
+            if resample is None:
+                resample = Image.Resampling.BILINEAR
+            return (size["width"], size["height"]), Image.Resampling(int(resample))
+        return None, None
+
+    @property
+    def image_size(self) -> Optional[Tuple[int, int]]:
+        """
+        The (width, height) every image is resized to before it reaches the processor, or None
+        if the processor does not use a fixed size.
+        """
+        return self._target_size()[0]
+
+    def prepare_image(self, image: Union[Image.Image, np.ndarray]) -> Image.Image:
+        """
+        Converts an in-memory image to RGB and resizes it to the size the processor expects, so
+        that no temporary file is needed and the full-size image is only processed once.
+
+        Args:
+            image (Union[Image.Image, np.ndarray]): A PIL image, or an HxWxC (or HxW) uint8 array.
+
+        Returns:
+            Image.Image: The prepared image.
+        """
+        key = id(image)
+        entry = self._prepared_images.get(key)
+        # id() values are reused once an image is garbage collected, so check the weakref too
+        if entry is not None and entry[0]() is image:
+            self._prepared_images.move_to_end(key)
+            return entry[1]
+
+        prepared = Image.fromarray(image) if isinstance(image, np.ndarray) else image
+        if prepared.mode != "RGB":
+            prepared = prepared.convert("RGB")
+        target_size, resample = self._target_size()
+        if target_size is not None and prepared.size != target_size:
+            prepared = prepared.resize(target_size, resample=resample)
+
+        if self.image_cache_size > 0:
+            self._prepared_images[key] = (weakref.ref(image), prepared)
+            while len(self._prepared_images) > self.image_cache_size:
+                self._prepared_images.popitem(last=False)
+        return prepared
+
+    def _build_messages(self, system_message, user_messages):
+        user_content = []
+        for message in user_messages:
+            image = message.get("image") if message.get("type") == "image" else None
+            if isinstance(image, (Image.Image, np.ndarray)):
+                message = {**message, "image": self.prepare_image(image)}
+            user_content.append(message)
+
+        return [
             {"role": "system", "content": [{"type": "text", "text": system_message}]},
-            {"role": "user", "content": user_messages},
+            {"role": "user", "content": user_content},
         ]
 
+    def invoke(self, system_message, user_messages, max_tokens=1000, temperature=0.1):
+        input_messages = self._build_messages(system_message, user_messages)
+
         output = self.multimodal_pipe(
             text=input_messages,
             max_new_tokens=max_tokens,
-            generate_kwargs={
-                "temperature": temperature,
-                "do_sample": True,
-            },
+            generate_kwargs=self._generate_kwargs(temperature),
             return_full_text=False,
         )
         return output
+
+    def _json_logits_processor(self, output_schema):
+        # Compiling the guide is expensive, so it is done once per schema
+        if output_schema not in self._json_processors:
+            from outlines.models.transformers import TransformerTokenizer
+
+            tokenizer = TransformerTokenizer(self.multimodal_pipe.tokenizer)
+            if self.guide_cache is not None:
+                processor = self.guide_cache.json_logits_processor(
+                    output_schema, tokenizer
+                )
+            else:
+                from outlines.processors import JSONLogitsProcessor
+
+                processor = JSONLogitsProcessor(output_schema, tokenizer)
+            self._json_processors[output_schema] = processor
+        return self._json_processors[output_schema]
+
+    def _generate_kwargs(self, temperature, output_schema=None):
+        generate_kwargs = {
+            "temperature": temperature,
+            "do_sample": True,
+        }
+        if output_schema is not None:
+            from transformers import LogitsProcessorList
+
+            # The processor tracks the guide state of each sequence, so every call gets a fresh copy
+            generate_kwargs["logits_processor"] = LogitsProcessorList(
+                [self._json_logits_processor(output_schema).copy()]
+            )
+        return generate_kwargs
+
+    @staticmethod
+    def _parse_structured_output(output, output_schema):
+        try:
+            return output_schema.model_validate_json(output[0]["generated_text"])
+        except Exception as e:
+            print(f"Error parsing structured output: {e}")
+            return None
+
+    def invoke_structured(
+        self,
+        system_message: str,
+        user_messages: List[Dict[str, Any]],
+        output_schema: Type[BaseModel],
+        max_tokens: int = 1000,
+        temperature: float = 0.1,
+    ) -> Optional[BaseModel]:
+        """
+        Extracts structured output from the images and text in a single pass, by constraining the
+        multimodal model's generation to the JSON schema of output_schema with outlines.
+
+        This replaces the two-stage path (invoke, then StructuredOutputModel on the free text) with
+        one model load, one prefill and one decode per card. invoke is unchanged, so both paths can
+        be compared.
+
+        Example usage:
+        meal = multimodal_model_caller.invoke_structured(
+            system_message=multimodal_system_prompt,
+            user_messages=[{"type": "image", "image": image}, {"type": "text", "text": multimodal_user_query}],
+            output_schema=ExtractedMeal,
+        )
+
+        Args:
+            system_message (str): The system message for the model.
+            user_messages (List[Dict[str, Any]]): The user message content, as for invoke.
+            output_schema (Type[BaseModel]): The pydantic model the output must follow.
+            max_tokens (int, optional): The maximum number of tokens to generate. Defaults to 1000.
+            temperature (float, optional): The sampling temperature. Defaults to 0.1.
+
+        Returns:
+            Optional[BaseModel]: An instance of output_schema, or None if the output could not be parsed.
+        """
+        output = self.multimodal_pipe(
+            text=self._build_messages(system_message, user_messages),
+            max_new_tokens=max_tokens,
+            generate_kwargs=self._generate_kwargs(temperature, output_schema),
+            return_full_text=False,
+        )
+        return self._parse_structured_output(output, output_schema)
+
+    @classmethod
+    def _estimate_input_size(
+        cls, system_message: str, user_messages: List[Dict[str, Any]]
+    ) -> Tuple[int, int, int]:
+        """
+        Estimates the size of a request without running the processor.
+
+        Returns:
+            Tuple[int, int, int]: The number of images, their total pixel count and the
+                estimated number of prompt tokens.
+        """
+        n_images = 0
+        n_pixels = 0
+        n_chars = len(system_message)
+        for message in user_messages:
+            if message.get("type") == "image":
+                n_images += 1
+                image = message.get("image")
+                if isinstance(image, Image.Image):
+                    width, height = image.size
+                    n_pixels += width * height
+                elif isinstance(image, np.ndarray):
+                    n_pixels += image.shape[0] * image.shape[1]
+                elif isinstance(image, str) and not image.startswith("http"):
+                    # Only reads the header, the pixels are decoded later by the pipeline
+                    try:
+                        with Image.open(image) as opened:
+                            width, height = opened.size
+                        n_pixels += width * height
+                    except OSError:
+                        pass
+            else:
+                n_chars += len(message.get("text", ""))
+
+        n_tokens = n_chars // cls.CHARS_PER_TOKEN + n_images * cls.IMAGE_TOKENS
+        return n_images, n_pixels, n_tokens
+
+    @staticmethod
+    def _group_batches(
+        sizes: Sequence[Tuple[int, int, int]],
+        batch_size: int,
+        max_batch_tokens: Optional[int],
+        max_tokens: int,
+    ) -> List[List[int]]:
+        """
+        Groups request indices into batches of similar size.
+
+        Requests are sorted by image count, image size and prompt length, so each batch pads
+        its members to a similar length. A batch is closed when it reaches batch_size, or when
+        its padded size (members x longest prompt plus generated tokens) would exceed
+        max_batch_tokens.
+        """
+        order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+
+        batches = []
+        batch = []
+        longest = 0
+        for i in order:
+            longest_with_item = max(longest, sizes[i][2] + max_tokens)
+            if batch and (
+                len(batch) >= batch_size
+                or (
+                    max_batch_tokens is not None
+                    and longest_with_item * (len(batch) + 1) > max_batch_tokens
+                )
+            ):
+                batches.append(batch)
+                batch = []
+                longest_with_item = sizes[i][2] + max_tokens
+            batch.append(i)
+            longest = longest_with_item
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def invoke_batch(
+        self,
+        requests: List[Tuple[str, List[Dict[str, Any]]]],
+        max_tokens: int = 1000,
+        temperature: float = 0.1,
+        batch_size: int = 4,
+        max_batch_tokens: Optional[int] = None,
+        output_schema: Optional[Type[BaseModel]] = None,
+    ) -> List[Any]:
+        """
+        Runs many requests through the pipeline in padding-aware batches.
+
+        Batching amortizes the fixed per-call overhead of the pipeline. Requests are grouped by
+        image size and prompt length so that little compute is spent on padding, and the outputs
+        are returned in the order of the requests.
+
+        Example usage:
+        requests = [
+            (multimodal_system_prompt, [{"type": "image", "image": path}, {"type": "text", "text": multimodal_user_query}])
+            for path in images
+        ]
+        results = multimodal_model_caller.invoke_batch(requests, batch_size=4, max_batch_tokens=8192)
+        texts = [result[0]["generated_text"] for result in results]
+
+        Args:
+            requests (List[Tuple[str, List[Dict[str, Any]]]]): (system_message, user_messages) pairs,
+                in the same format as invoke.
+            max_tokens (int, optional): The maximum number of tokens to generate per request. Defaults to 1000.
+            temperature (float, optional): The sampling temperature. Defaults to 0.1.
+            batch_size (int, optional): The maximum number of requests per batch. Defaults to 4.
+            max_batch_tokens (Optional[int]): Memory budget for one batch, as the number of padded
+                prompt and generated tokens it may hold. Defaults to None (no limit).
+            output_schema (Optional[Type[BaseModel]]): If set, generation is constrained to this
+                schema as in invoke_structured. Defaults to None.
+
+        Returns:
+            List[Any]: One pipeline output per request, as returned by invoke, or one parsed
+                output_schema instance (None if parsing failed) when output_schema is set.
+        """
+        sizes = [
+            self._estimate_input_size(system_message, user_messages)
+            for system_message, user_messages in requests
+        ]
+        batches = self._group_batches(sizes, batch_size, max_batch_tokens, max_tokens)
+
+        # Decoder-only generation needs the prompts aligned on the right. The tokenizer is shared
+        # with invoke and other callers, so its padding side is restored afterwards
+        tokenizer = getattr(self.multimodal_pipe, "tokenizer", None)
+        padding_side = getattr(tokenizer, "padding_side", None)
+        if tokenizer is not None:
+            tokenizer.padding_side = "left"
+
+        outputs = [None] * len(requests)
+        try:
+            for batch in batches:
+                batch_output = self.multimodal_pipe(
+                    text=[self._build_messages(*requests[i]) for i in batch],
+                    batch_size=len(batch),
+                    max_new_tokens=max_tokens,
+                    generate_kwargs=self._generate_kwargs(temperature, output_schema),
+                    return_full_text=False,
+                )
+                for i, output in zip(batch, batch_output):
+                    if output_schema is not None:
+                        output = self._parse_structured_output(output, output_schema)
+                    outputs[i] = output
+        finally:
+            if tokenizer is not None:
+                tokenizer.padding_side = padding_side
+        return outputs
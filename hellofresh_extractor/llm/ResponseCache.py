@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type, Union
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "hellofresh_extractor", "responses.sqlite"
+)
+
+
+class ResponseCache:
+    """
+    A persistent, content-addressed cache for structured LLM responses, backed by SQLite.
+
+    Entries are keyed by a hash of everything that determines the model output (model name,
+    system message, encoded image bytes, text parts, output schema and sampling settings), so
+    re-running the same extraction is served from disk instead of the API. The cache is bounded
+    in size and evicts the least recently used entries first.
+
+    Example usage:
+    cache = ResponseCache(max_size_bytes=256 * 1024 * 1024)
+    gemini_caller = StructuredGeminiCaller(api_key=api_key, model=model, cache=cache)
+
+    Attributes:
+        path (str): Location of the SQLite database.
+        max_size_bytes (int): Maximum total size of the stored responses.
+        bypass (bool): If True, lookups always miss but new responses are still stored.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that were not found in the cache.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_size_bytes: int = 1024 * 1024 * 1024,
+        bypass: bool = False,
+    ) -> None:
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            path (str, optional): Location of the SQLite database. Defaults to ~/.cache/hellofresh_extractor.
+            max_size_bytes (int, optional): Maximum total size of the stored responses. Defaults to 1GB.
+            bypass (bool, optional): If True, skip lookups so every request goes to the model. Defaults to False.
+        """
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_accessed ON responses (last_accessed)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(
+        model_name: str,
+        system_message: str,
+        input_content: Union[str, List[Union[str, "Image.Image", dict]]],
+        output_schema: Type[BaseModel] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 1000,
+    ) -> str:
+        """
+        Computes the cache key for a request.
+
+        Args:
+            model_name (str): The name of the model.
+            system_message (str): The system message.
+            input_content (Union[str, List[Union[str, Image.Image, dict]]]): The request content.
+            output_schema (Type[BaseModel], optional): Pydantic model for structured output. Defaults to None.
+            temperature (float, optional): The sampling temperature. Defaults to 0.0.
+            max_tokens (int, optional): The maximum number of tokens to generate. Defaults to 1000.
+
+        Returns:
+            str: A hex digest identifying the request.
+        """
+        from PIL import Image
+        from hellofresh_extractor.llm.EncodedImage import EncodedImage
+
+        digest = hashlib.sha256()
+
+        def update(tag: str, data: bytes) -> None:
+            # Length-prefix every field so that adjacent fields cannot collide
+            digest.update(f"{tag}:{len(data)}:".encode("utf-8"))
+            digest.update(data)
+
+        update("model", model_name.encode("utf-8"))
+        update("system", (system_message or "").encode("utf-8"))
+
+        if not isinstance(input_content, list):
+            input_content = [input_content]
+        for item in input_content:
+            if isinstance(item, str):
+                update("text", item.encode("utf-8"))
+            elif isinstance(item, Image.Image):
+                update("image", EncodedImage.from_image(item).data)
+            else:
+                update(
+                    "part",
+                    json.dumps(item, sort_keys=True, default=str).encode("utf-8"),
+                )
+
+        schema_json = (
+            json.dumps(output_schema.model_json_schema(), sort_keys=True)
+            if output_schema
+            else ""
+        )
+        update("schema", schema_json.encode("utf-8"))
+        update("temperature", repr(float(temperature)).encode("utf-8"))
+        update("max_tokens", str(max_tokens).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Looks up a cached response and marks it as recently used.
+
+        Args:
+            key (str): The cache key, as returned by make_key.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached response, or None on a miss or if bypass is set.
+        """
+        if self.bypass:
+            self.misses += 1
+            return None
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._connection.execute(
+                "UPDATE responses SET last_accessed = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._connection.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Stores a response, evicting least recently used entries if the cache is over its size limit.
+
+        Args:
+            key (str): The cache key, as returned by make_key.
+            value (Dict[str, Any]): The JSON-serializable response to store.
+        """
+        serialized = json.dumps(value)
+        size = len(serialized.encode("utf-8"))
+        if size > self.max_size_bytes:
+            return
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_accessed) VALUES (?, ?, ?, ?)",
+                (key, serialized, size, time.time()),
+            )
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """
+        Deletes least recently used entries until the total size is within max_size_bytes.
+        """
+        total_size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        stale_keys = []
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_accessed ASC"
+        ):
+            if total_size <= self.max_size_bytes:
+                break
+            stale_keys.append((key,))
+            total_size -= size
+
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the hit/miss counters.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns cache usage statistics.
+
+        Returns:
+            Dict[str, int]: The hit and miss counts, number of entries and total stored size in bytes.
+        """
+        with self._lock:
+            entries, total_size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_bytes": total_size,
+        }
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._connection.close()
@@ -1,21 +1,25 @@
-import base64
-from io import BytesIO
-from typing import Any, Dict, List, Type, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Type, Union
 from pydantic import BaseModel
-from PIL import Image
-import anthropic
+
+if TYPE_CHECKING:
+    # PIL is only needed once images are passed in
+    from PIL import Image
+    from hellofresh_extractor.llm.ResponseCache import ResponseCache
 
 
 class StructuredClaudeCaller:
-    def __init__(self, api_key: str, model: str):
+    def __init__(self, api_key: str, model: str, cache: "ResponseCache" = None):
         self.api_key = api_key
         self.model_name = model
+        import anthropic
+
         self.client = anthropic.Anthropic(api_key=api_key)
+        self.cache = cache
 
     def invoke(
         self,
         system_message: str,
-        input_content: Union[str, List[Union[str, Image.Image, dict]]],
+        input_content: Union[str, List[Union[str, "Image.Image", dict]]],
         output_schema: Type[BaseModel] = None,
         temperature: float = 0.0,
         max_tokens: int = 1000,
@@ -24,6 +28,20 @@ class StructuredClaudeCaller:
         Calls Claude with structured output and multimodal support.
         """
         try:
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(
+                    self.model_name,
+                    system_message,
+                    input_content,
+                    output_schema,
+                    temperature,
+                    max_tokens,
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
             messages = self._prepare_messages(input_content, output_schema)
             response = self.client.messages.create(
                 system=system_message,
@@ -43,6 +61,9 @@ class StructuredClaudeCaller:
                     result["structured_data"] = structured_data.model_dump()
                 except Exception as e:
                     print(f"Error parsing structured output: {e}")
+
+            if cache_key and (not output_schema or "structured_data" in result):
+                self.cache.set(cache_key, result)
             return result
         except Exception as e:
             print(f"Error calling Claude: {e}")
@@ -50,7 +71,7 @@ class StructuredClaudeCaller:
 
     def _prepare_messages(
         self,
-        input_content: Union[str, List[Union[str, Image.Image, dict]]],
+        input_content: Union[str, List[Union[str, "Image.Image", dict]]],
         output_schema: Type[BaseModel] = None,
     ) -> List[Dict[str, Any]]:
         """
@@ -73,11 +94,13 @@ class StructuredClaudeCaller:
         return prompt
 
     def _prepare_content_blocks(
-        self, input_content: Union[str, List[Union[str, Image.Image, dict]]]
+        self, input_content: Union[str, List[Union[str, "Image.Image", dict]]]
     ) -> List[Dict[str, Any]]:
         """
         Converts input content into Claude-compatible content blocks.
         """
+        from PIL import Image
+
         if isinstance(input_content, str):
             return [{"type": "text", "text": input_content}]
         if isinstance(input_content, Image.Image):
@@ -96,21 +119,13 @@ class StructuredClaudeCaller:
             return blocks
         return [{"type": "text", "text": str(input_content)}]
 
-    def _image_block(self, image: Image.Image) -> Dict[str, Any]:
+    def _image_block(self, image: "Image.Image") -> Dict[str, Any]:
         """
         Encodes a PIL image for Claude's API.
         """
-        buffer = BytesIO()
-        image.save(buffer, format="JPEG")
-        base64_data = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        return {
-            "type": "image",
-            "source": {
-                "type": "base64",
-                "media_type": "image/jpeg",
-                "data": base64_data,
-            },
-        }
+        from hellofresh_extractor.llm.EncodedImage import EncodedImage
+
+        return EncodedImage.from_image(image, "JPEG").to_claude_block()
 
     def _extract_text_response(self, response: Any) -> str:
         """
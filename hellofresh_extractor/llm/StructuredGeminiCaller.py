@@ -1,14 +1,18 @@
+import asyncio
 import json
-from google import genai
-from typing import Dict, Any, Union, List, Type
+from typing import TYPE_CHECKING, Dict, Any, Union, List, Type, Optional, Tuple
 from pydantic import BaseModel
-from PIL import Image
-import base64
-from io import BytesIO
+from hellofresh_extractor.llm.utils import run_coroutine_sync
+
+if TYPE_CHECKING:
+    # PIL is only needed once images are passed in
+    from google import genai
+    from PIL import Image
+    from hellofresh_extractor.llm.ResponseCache import ResponseCache
 
 
 class StructuredGeminiCaller:
-    def __init__(self, api_key: str, model: str):
+    def __init__(self, api_key: str, model: str, cache: "ResponseCache" = None):
         """
         Initializes the GeminiCaller with an API key and model name.
 
@@ -31,15 +35,19 @@ class StructuredGeminiCaller:
         Args:
             api_key (str): The API key for accessing the Gemini LLM.
             model (str): The name of the Gemini model to use.
+            cache (ResponseCache, optional): Cache for responses to identical requests. Defaults to None.
         """
         self.api_key = api_key
         self.model_name = model
+        from google import genai
+
         self.client = genai.Client(api_key=api_key)
+        self.cache = cache
 
     def invoke(
         self,
         system_message: str,
-        input_content: Union[str, List[Union[str, Image.Image, dict]]],
+        input_content: Union[str, List[Union[str, "Image.Image", dict]]],
         output_schema: Type[BaseModel] = None,
         temperature: float = 0.0,
         max_tokens: int = 1000,
@@ -59,56 +67,261 @@ class StructuredGeminiCaller:
             Dict[str, Any]: The response from the model. If an error occurs, an empty dictionary is returned.
         """
         try:
+            cache_key, cached = self._cache_lookup(
+                system_message, input_content, output_schema, temperature, max_tokens
+            )
+            if cached is not None:
+                return cached
+
             # Process input content
             contents = self._prepare_contents(input_content)
-
-            # Configure generation parameters
-            config = genai.types.GenerateContentConfig(
-                system_instruction=system_message,
-                max_output_tokens=max_tokens,
-                temperature=temperature,
-                thinking_config=genai.types.ThinkingConfig(thinking_budget=0),
+            config = self._build_config(
+                system_message, output_schema, temperature, max_tokens
             )
 
-            # Add structured output schema if provided
-            if output_schema:
-                config.response_mime_type = "application/json"
-                config.response_schema = output_schema
-
             # Generate content
             res = self.client.models.generate_content(
                 model=self.model_name,
                 contents=contents,
                 config=config,
             )
+            res = self._parse_response(res, output_schema)
+            self._cache_store(cache_key, res, output_schema)
 
-            # Parse the response
-            res = json.loads(res.model_dump_json())
+        except Exception as e:
+            print(f"Error calling {self.model_name}: {e}")
+            res = {}
 
-            # If using structured output, parse the response text as the Pydantic model
-            if output_schema and "candidates" in res and res["candidates"]:
-                if (
-                    "content" in res["candidates"][0]
-                    and "parts" in res["candidates"][0]["content"]
-                ):
-                    for part in res["candidates"][0]["content"]["parts"]:
-                        if "text" in part:
-                            try:
-                                # Parse the JSON response into the Pydantic model
-                                structured_data = output_schema.model_validate_json(
-                                    part["text"]
-                                )
-                                # Add the structured data to the response
-                                res["structured_data"] = structured_data.model_dump()
-                            except Exception as e:
-                                print(f"Error parsing structured output: {e}")
+        return res
+
+    async def ainvoke(
+        self,
+        system_message: str,
+        input_content: Union[str, List[Union[str, "Image.Image", dict]]],
+        output_schema: Type[BaseModel] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 1000,
+    ) -> Dict[str, Any]:
+        """
+        Async version of invoke, using the async genai client.
 
+        Args:
+            Same as invoke.
+
+        Returns:
+            Dict[str, Any]: The response from the model. If an error occurs, an empty dictionary is returned.
+        """
+        try:
+            res = await self._agenerate(
+                system_message, input_content, output_schema, temperature, max_tokens
+            )
         except Exception as e:
             print(f"Error calling {self.model_name}: {e}")
             res = {}
 
         return res
 
+    async def ainvoke_many(
+        self, items: List[Dict[str, Any]], max_concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Async version of invoke_many.
+
+        Args:
+            Same as invoke_many.
+
+        Returns:
+            List[Dict[str, Any]]: One response per item, in input order. A failed item is
+                returned as an empty dictionary, like a failed ainvoke.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.ainvoke(**item)
+
+        return await asyncio.gather(*(run_one(item) for item in items))
+
+    def invoke_many(
+        self, items: List[Dict[str, Any]], max_concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Invokes the model on many inputs concurrently, with at most max_concurrency
+        requests in flight. All requests share this caller's client and connection pool.
+
+        Example usage:
+        results = gemini_caller.invoke_many(
+            [
+                {
+                    "system_message": system_prompt,
+                    "input_content": [image, user_query],
+                    "output_schema": ExtractedMeal,
+                }
+                for image in images
+            ],
+            max_concurrency=16,
+        )
+
+        Args:
+            items (List[Dict[str, Any]]): Keyword arguments for invoke, one dict per request.
+            max_concurrency (int, optional): Maximum number of requests in flight. Defaults to 8.
+
+        Returns:
+            List[Dict[str, Any]]: One response per item, in input order. A failed item is
+                returned as an empty dictionary, like a failed invoke, and does not affect the others.
+        """
+        return run_coroutine_sync(self.ainvoke_many(items, max_concurrency))
+
+    async def _agenerate(
+        self,
+        system_message: str,
+        input_content: Union[str, List[Union[str, "Image.Image", dict]]],
+        output_schema: Type[BaseModel] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 1000,
+    ) -> Dict[str, Any]:
+        """
+        Makes a single async generate_content call. Errors are raised to the caller.
+        """
+        # Cache lookups and image encoding block, so keep them off the event loop
+        cache_key, cached = await asyncio.to_thread(
+            self._cache_lookup,
+            system_message,
+            input_content,
+            output_schema,
+            temperature,
+            max_tokens,
+        )
+        if cached is not None:
+            return cached
+
+        contents = await asyncio.to_thread(self._prepare_contents, input_content)
+        config = self._build_config(
+            system_message, output_schema, temperature, max_tokens
+        )
+
+        res = await self.client.aio.models.generate_content(
+            model=self.model_name,
+            contents=contents,
+            config=config,
+        )
+        res = self._parse_response(res, output_schema)
+        await asyncio.to_thread(self._cache_store, cache_key, res, output_schema)
+        return res
+
+    def _cache_lookup(
+        self,
+        system_message: str,
+        input_content: Union[str, List[Union[str, "Image.Image", dict]]],
+        output_schema: Type[BaseModel],
+        temperature: float,
+        max_tokens: int,
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Looks up a request in the response cache, if one is configured.
+
+        Returns:
+            Tuple[Optional[str], Optional[Dict[str, Any]]]: The cache key and the cached response.
+                Both are None if no cache is configured; the response is None on a miss.
+        """
+        if not self.cache:
+            return None, None
+
+        cache_key = self.cache.make_key(
+            self.model_name,
+            system_message,
+            input_content,
+            output_schema,
+            temperature,
+            max_tokens,
+        )
+        return cache_key, self.cache.get(cache_key)
+
+    def _cache_store(
+        self,
+        cache_key: Optional[str],
+        res: Dict[str, Any],
+        output_schema: Type[BaseModel] = None,
+    ) -> None:
+        """
+        Stores a response in the cache. Responses whose structured output failed to parse are not stored.
+        """
+        if not self.cache or cache_key is None:
+            return
+        if output_schema and "structured_data" not in res:
+            return
+        self.cache.set(cache_key, res)
+
+    def _build_config(
+        self,
+        system_message: str,
+        output_schema: Type[BaseModel],
+        temperature: float,
+        max_tokens: int,
+    ) -> "genai.types.GenerateContentConfig":
+        """
+        Builds the generation config for a request.
+
+        Args:
+            system_message (str): The system instruction for the model.
+            output_schema (Type[BaseModel]): Pydantic model for structured output, or None.
+            temperature (float): The sampling temperature.
+            max_tokens (int): The maximum number of tokens to generate.
+
+        Returns:
+            genai.types.GenerateContentConfig: The generation config.
+        """
+        from google import genai
+
+        config = genai.types.GenerateContentConfig(
+            system_instruction=system_message,
+            max_output_tokens=max_tokens,
+            temperature=temperature,
+            thinking_config=genai.types.ThinkingConfig(thinking_budget=0),
+        )
+
+        # Add structured output schema if provided
+        if output_schema:
+            config.response_mime_type = "application/json"
+            config.response_schema = output_schema
+
+        return config
+
+    def _parse_response(
+        self, response: Any, output_schema: Type[BaseModel] = None
+    ) -> Dict[str, Any]:
+        """
+        Converts a generate_content response to a dict, adding structured_data if a schema was used.
+
+        Args:
+            response (Any): The response returned by generate_content.
+            output_schema (Type[BaseModel], optional): Pydantic model for structured output. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: The parsed response.
+        """
+        res = json.loads(response.model_dump_json())
+
+        # If using structured output, parse the response text as the Pydantic model
+        if output_schema and "candidates" in res and res["candidates"]:
+            if (
+                "content" in res["candidates"][0]
+                and "parts" in res["candidates"][0]["content"]
+            ):
+                for part in res["candidates"][0]["content"]["parts"]:
+                    if "text" in part:
+                        try:
+                            # Parse the JSON response into the Pydantic model
+                            structured_data = output_schema.model_validate_json(
+                                part["text"]
+                            )
+                            # Add the structured data to the response
+                            res["structured_data"] = structured_data.model_dump()
+                        except Exception as e:
+                            print(f"Error parsing structured output: {e}")
+
+        return res
+
     def _prepare_contents(self, input_content):
         """
         Prepares the input content for the model.
@@ -119,6 +332,8 @@ class StructuredGeminiCaller:
         Returns:
             List: A list of content items ready for the model.
         """
+        from PIL import Image
+
         if isinstance(input_content, str):
             return [input_content]
 
@@ -147,7 +362,7 @@ class StructuredGeminiCaller:
         # Default case
         return [input_content]
 
-    def _process_image(self, image: Image.Image):
+    def _process_image(self, image: "Image.Image"):
         """
         Processes an image for the model.
 
@@ -157,37 +372,26 @@ class StructuredGeminiCaller:
         Returns:
             dict: A dictionary containing the processed image data.
         """
-        # For files larger than 20MB, use the File API
-        if self._estimate_image_size(image) > 20 * 1024 * 1024:
-            # Convert image to bytes
-            buffer = BytesIO()
-            image.save(buffer, format=image.format or "JPEG")
-            buffer.seek(0)
+        from io import BytesIO
+        from hellofresh_extractor.llm.EncodedImage import EncodedImage
+
+        # Encode once and reuse the bytes for the size check and the payload
+        encoded = EncodedImage.from_image(image)
 
-            # Upload the file
+        # For files larger than 20MB, use the File API
+        if encoded.size > 20 * 1024 * 1024:
             file = self.client.files.upload(
-                file=buffer.read(),
-                mime_type=f"image/{image.format.lower() if image.format else 'jpeg'}",
+                file=BytesIO(encoded.data),
+                config={"mime_type": encoded.mime_type},
             )
 
             # Return the file reference
             return file
 
         # For smaller images, use inline data
-        buffer = BytesIO()
-        image.save(buffer, format=image.format or "JPEG")
-        buffer.seek(0)
-        image_bytes = buffer.read()
-
-        # Return inline image data
-        return {
-            "inlineData": {
-                "mimeType": f"image/{image.format.lower() if image.format else 'jpeg'}",
-                "data": base64.b64encode(image_bytes).decode("utf-8"),
-            }
-        }
+        return encoded.to_gemini_inline()
 
-    def _estimate_image_size(self, image: Image.Image) -> int:
+    def _estimate_image_size(self, image: "Image.Image") -> int:
         """
         Estimates the size of an image in bytes.
 
@@ -197,9 +401,9 @@ class StructuredGeminiCaller:
         Returns:
             int: Estimated size in bytes.
         """
-        buffer = BytesIO()
-        image.save(buffer, format=image.format or "JPEG")
-        return buffer.tell()
+        from hellofresh_extractor.llm.EncodedImage import EncodedImage
+
+        return EncodedImage.from_image(image).size
 
     @staticmethod
     def token_counter(model_output: Any) -> Dict[str, int]:
@@ -1,9 +1,28 @@
-import outlines
+from copy import copy, deepcopy
 
 
 class StructuredOutputModel:
-    def __init__(self, model, outputmodel, structure_mode="json"):
+    # Stands in for the extracted text when splitting the fixed prompt prefix from the rest
+    PREFIX_SENTINEL = "<<hellofresh_extractor:text_to_extract>>"
+
+    def __init__(
+        self,
+        model,
+        outputmodel,
+        structure_mode="json",
+        guide_cache=None,
+        prefix_cache=False,
+    ):
         self.model = model
+        # Optional GuideCache, so the compiled JSON guide is loaded from disk when present
+        self.guide_cache = guide_cache
+        # If True, the KV state of the templated prompt prefix is computed once and reused
+        if prefix_cache and not hasattr(getattr(model, "model", None), "generate"):
+            raise NotImplementedError(
+                "Prefix caching only supports outlines transformers models"
+            )
+        self.prefix_cache = prefix_cache
+        self._prefix_states = {}
         self.structure_generator = self.set_up_structured_caller(
             mode=structure_mode, outputmodel=outputmodel
         )
@@ -25,9 +44,16 @@ class StructuredOutputModel:
         self,
         outputmodel,
         mode="json",
-        sampler=outlines.samplers.multinomial(temperature=0.5),
+        sampler=None,
     ):
-        if mode == "json":
+        import outlines
+
+        if sampler is None:
+            sampler = outlines.samplers.multinomial(temperature=0.5)
+
+        if mode == "json" and self.guide_cache is not None:
+            structure_generator = self._cached_json_generator(outputmodel, sampler)
+        elif mode == "json":
             structure_generator = outlines.generate.json(
                 self.model, outputmodel, sampler=sampler
             )
@@ -36,7 +62,20 @@ class StructuredOutputModel:
 
         return structure_generator
 
-    def invoke(self, system_message, user_query, text_to_extract):
+    def _cached_json_generator(self, outputmodel, sampler):
+        # Mirrors outlines.generate.json, with the guide coming from the guide cache
+        from outlines.generate.api import SequenceGeneratorAdapter
+
+        logits_processor = self.guide_cache.json_logits_processor(
+            outputmodel, self.model.tokenizer
+        )
+        structure_generator = SequenceGeneratorAdapter(
+            self.model, logits_processor, sampler
+        )
+        structure_generator.format_sequence = outputmodel.model_validate_json
+        return structure_generator
+
+    def build_prompt(self, system_message, user_query, text_to_extract):
         extraction_user_message = f"""
 
         You have been asked to perform the following task:
@@ -48,9 +87,142 @@ class StructuredOutputModel:
         {text_to_extract}
         """
 
-        assembled_prompt = self.create_prompt_template(
+        return self.create_prompt_template(
             user_message=extraction_user_message, system_message=system_message
         )
 
+    def invoke(self, system_message, user_query, text_to_extract):
+        assembled_prompt = self.build_prompt(system_message, user_query, text_to_extract)
+
+        if self.prefix_cache:
+            return self._generate_with_prefix_cache(
+                assembled_prompt, self._prefix_state(system_message, user_query)
+            )
+
         structured_result = self.structure_generator(assembled_prompt)
         return structured_result
+
+    def _prefix_state(self, system_message, user_query):
+        """
+        Returns the token ids and KV cache of the part of the prompt that comes before the text
+        to extract, running the model over it the first time a (system, query) pair is seen.
+        """
+        key = (system_message, user_query)
+        if key in self._prefix_states:
+            return self._prefix_states[key]
+
+        import torch
+        from transformers import DynamicCache
+
+        prefix_text = self.build_prompt(
+            system_message, user_query, self.PREFIX_SENTINEL
+        ).split(self.PREFIX_SENTINEL)[0]
+        prefix_ids, _ = self.model.tokenizer.encode([prefix_text])
+        # The last token may merge with the start of the extracted text, so it is left out
+        prefix_ids = prefix_ids[:, :-1]
+
+        with torch.no_grad():
+            kv_cache = self.model.model(
+                input_ids=prefix_ids.to(self.model.model.device),
+                past_key_values=DynamicCache(),
+                use_cache=True,
+            ).past_key_values
+
+        self._prefix_states[key] = (prefix_ids[0].tolist(), kv_cache)
+        return self._prefix_states[key]
+
+    def _generate_with_prefix_cache(self, prompt, prefix_state):
+        prefix_ids, kv_cache = prefix_state
+        input_ids, attention_mask = self.model.tokenizer.encode([prompt])
+
+        # Only reuse the cache if the prompt really starts with the cached tokens
+        n_prefix = len(prefix_ids)
+        if (
+            input_ids.shape[1] <= n_prefix
+            or input_ids[0, :n_prefix].tolist() != prefix_ids
+        ):
+            return self.structure_generator(prompt)
+
+        generator = self.structure_generator
+        generation_kwargs = self.model._get_generation_kwargs(
+            prompt,
+            generator.prepare_generation_parameters(None, None, None),
+            copy(generator.logits_processor),
+            generator.sampling_params,
+        )
+        # generate extends the cache in place, so each call works on its own copy and only
+        # runs the prefill over the tokens after the prefix
+        output_ids = self.model.model.generate(
+            input_ids=input_ids.to(self.model.model.device),
+            attention_mask=attention_mask.to(self.model.model.device),
+            past_key_values=deepcopy(kv_cache),
+            **generation_kwargs,
+        )
+        sequence = self.model.tokenizer.decode(output_ids[:, input_ids.shape[1] :])[0]
+        return generator.format_sequence(sequence)
+
+    def invoke_batch(self, system_message, user_query, texts_to_extract, batch_size=8):
+        """
+        Extracts structured output from many texts, passing them to the generator in batches.
+
+        Each item is parsed separately, so one invalid output does not lose the rest of its
+        batch. If generating a whole batch fails, its items are retried one at a time.
+
+        Example usage:
+        texts = [result[0]["generated_text"] for result in multimodal_results]
+        structured_results = structured_model_caller.invoke_batch(
+            system_message=structured_system_prompt,
+            user_query=multimodal_user_query,
+            texts_to_extract=texts,
+        )
+
+        Args:
+            system_message (str): The system message for the model.
+            user_query (str): The task, shared by every item.
+            texts_to_extract (List[str]): The texts to parse.
+            batch_size (int, optional): The number of prompts generated together. Defaults to 8.
+
+        Returns:
+            List[Optional[BaseModel]]: One result per text, in order. None for items that failed.
+        """
+        prompts = [
+            self.build_prompt(system_message, user_query, text)
+            for text in texts_to_extract
+        ]
+
+        results = []
+        for start in range(0, len(prompts), batch_size):
+            batch = prompts[start : start + batch_size]
+            try:
+                sequences = self._generate_sequences(batch)
+            except Exception as e:
+                print(f"Error in batched generation, retrying items one at a time: {e}")
+                results.extend(self._invoke_prompt(prompt) for prompt in batch)
+                continue
+
+            for sequence in sequences:
+                try:
+                    results.append(self.structure_generator.format_sequence(sequence))
+                except Exception as e:
+                    print(f"Error parsing structured output: {e}")
+                    results.append(None)
+        return results
+
+    def _generate_sequences(self, prompts):
+        # Same as calling the generator, but returns the raw text so that each output can be
+        # parsed (and fail) on its own
+        generator = self.structure_generator
+        sequences = generator.model.generate(
+            prompts,
+            generator.prepare_generation_parameters(None, None, None),
+            copy(generator.logits_processor),
+            generator.sampling_params,
+        )
+        return sequences if isinstance(sequences, list) else [sequences]
+
+    def _invoke_prompt(self, prompt):
+        try:
+            return self.structure_generator(prompt)
+        except Exception as e:
+            print(f"Error in structured output generation: {e}")
+            return None
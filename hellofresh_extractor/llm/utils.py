@@ -1,8 +1,37 @@
+import asyncio
+import threading
 import uuid
-import pandas as pd
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop():
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_background_loop.run_forever,
+                name="hellofresh-extractor-loop",
+                daemon=True,
+            ).start()
+    return _background_loop
+
+
+def run_coroutine_sync(coroutine):
+    """
+    Runs a coroutine to completion from synchronous code, including inside Jupyter
+    where an event loop is already running. All coroutines run on one long-lived
+    background loop, so async clients (and their connection pools) can be reused
+    between calls.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_background_loop()).result()
 
 
 def convert_structured_result_to_df(structured_result):
+    import pandas as pd
+
     if not isinstance(structured_result, dict):
         json_data = structured_result.model_dump()
     else:
@@ -0,0 +1,153 @@
+import gzip
+import os
+from typing import Any, Dict, Optional
+import pandas as pd
+
+
+class ResultSink:
+    """
+    Streams extraction result DataFrames to a Parquet or gzip-compressed CSV file as they are
+    produced, instead of concatenating everything in memory and writing it at the end.
+
+    Each call to write appends one Parquet row group (or a block of CSV rows). Parquet output
+    needs the optional pyarrow package, which is checked when the sink is created so a missing
+    install fails before any work is done.
+
+    Example usage:
+    with ResultSink("hello_fresh_recipes.parquet") as sink:
+        for df in pipeline.run():
+            sink.write(df)
+    sink.upload(drive_helper, parent_folder_id=top_level_drive_folder_id)
+
+    Attributes:
+        path (str): The output file.
+        output_format (str): Either "parquet" or "csv.gz".
+        rows_written (int): The number of rows written so far.
+    """
+
+    MIME_TYPES = {"parquet": "application/vnd.apache.parquet", "csv.gz": "application/gzip"}
+
+    def __init__(self, path: str, output_format: Optional[str] = None) -> None:
+        """
+        Initializes the sink. The file is created on the first write.
+
+        Args:
+            path (str): The output file.
+            output_format (Optional[str]): Either "parquet" or "csv.gz". Defaults to "parquet" if the
+                path ends in .parquet, and "csv.gz" otherwise.
+
+        Raises:
+            ImportError: If Parquet output is requested and pyarrow is not installed.
+        """
+        if output_format is None:
+            output_format = "parquet" if path.endswith(".parquet") else "csv.gz"
+        if output_format not in self.MIME_TYPES:
+            raise NotImplementedError(
+                "Only supports output_format='parquet' or output_format='csv.gz'"
+            )
+        if output_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ImportError(
+                    "Parquet output requires pyarrow. Install it or use output_format='csv.gz'"
+                ) from e
+
+        self.path = path
+        self.output_format = output_format
+        self.rows_written = 0
+        self._writer: Any = None
+        self._schema: Any = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Appends a DataFrame to the output file. All DataFrames must have the same columns.
+
+        Args:
+            df (pd.DataFrame): The rows to append.
+        """
+        if df.empty:
+            return
+
+        if self.output_format == "parquet":
+            self._write_parquet(df)
+        else:
+            self._write_csv(df)
+        self.rows_written += len(df)
+
+    def _to_table(self, df: pd.DataFrame) -> Any:
+        """
+        Converts a DataFrame to an Arrow table with the file's schema, which is fixed by the
+        first DataFrame written.
+        """
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._schema is None:
+            # An all-null column is inferred as type null, which later values cannot be cast to
+            self._schema = pa.schema(
+                [
+                    pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ],
+                metadata=table.schema.metadata,
+            )
+
+        columns = []
+        for field in self._schema:
+            column = table.column(field.name)
+            if pa.types.is_null(column.type):
+                column = pa.nulls(len(table), field.type)
+            columns.append(column.cast(field.type))
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def _write_parquet(self, df: pd.DataFrame) -> None:
+        import pyarrow.parquet as pq
+
+        table = self._to_table(df)
+        if self._writer is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+        self._writer.write_table(table)
+
+    def _write_csv(self, df: pd.DataFrame) -> None:
+        write_header = self._writer is None
+        if self._writer is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._writer = gzip.open(self.path, "wt", newline="")
+        df.to_csv(self._writer, index=False, header=write_header)
+
+    def close(self) -> None:
+        """
+        Finishes the output file.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def upload(
+        self, drive_helper: Any, parent_folder_id: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Closes the output file and uploads it to Google Drive with a resumable upload.
+
+        Args:
+            drive_helper (GoogleDriveHelper): The helper used to upload the file.
+            parent_folder_id (Optional[str]): ID of the folder to upload to. If None, uploads to the top-level folder.
+
+        Returns:
+            Dict[str, str]: Dictionary containing the uploaded file's ID and name.
+        """
+        self.close()
+        if not os.path.exists(self.path):
+            print(f"Nothing was written to {self.path}, skipping upload")
+            return {}
+        return drive_helper.upload_file_resumable(
+            self.path, parent_folder_id, mime_type=self.MIME_TYPES[self.output_format]
+        )
@@ -0,0 +1,179 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List
+
+# Marks the end of the stream on a queue
+_END = object()
+
+
+class Stage:
+    """
+    One step of a StreamingPipeline.
+
+    Attributes:
+        name (str): The name of the stage, used in error messages.
+        fn (Callable[[Any], Any]): Maps one input item to one output item. Returning None
+            drops the item, e.g. after a failed download.
+        workers (int): The number of threads running fn concurrently.
+        queue_size (int): The maximum number of items waiting between this stage and the next.
+        flat_map (bool): If True, fn returns an iterable and each element is passed on separately.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        workers: int = 1,
+        queue_size: int = 8,
+        flat_map: bool = False,
+    ) -> None:
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.flat_map = flat_map
+
+
+class StreamingPipeline:
+    """
+    Runs a source iterable through a chain of stages connected by bounded queues.
+
+    Every stage runs in its own pool of threads, so later stages start on the first items
+    while earlier stages are still working through the rest, and at most queue_size items
+    wait between any two stages. Output order is not preserved when a stage has more than
+    one worker.
+
+    Example usage:
+    pipeline = StreamingPipeline(
+        source=image_paths,
+        stages=[
+            Stage("decode", decode_image, workers=4),
+            Stage("extract", extract_meal, workers=16, queue_size=32),
+        ],
+    )
+    for result in pipeline.run():
+        all_meals.append(result)
+
+    Attributes:
+        source (Iterable[Any]): The items fed into the first stage.
+        stages (List[Stage]): The stages, in order.
+        source_queue_size (int): The maximum number of source items waiting for the first stage.
+    """
+
+    def __init__(
+        self, source: Iterable[Any], stages: List[Stage], source_queue_size: int = 8
+    ) -> None:
+        self.source = source
+        self.stages = stages
+        self.source_queue_size = source_queue_size
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        # Time out periodically so that threads notice when the pipeline is stopped
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _feed_source(self, out_queue: queue.Queue) -> None:
+        try:
+            for item in self.source:
+                if not self._put(out_queue, item):
+                    return
+        except Exception as e:
+            print(f"Error reading pipeline source: {e}")
+        self._put(out_queue, _END)
+
+    def _run_stage(
+        self,
+        stage: Stage,
+        in_queue: queue.Queue,
+        out_queue: queue.Queue,
+        state: dict,
+    ) -> None:
+        while True:
+            item = self._get(in_queue)
+            if item is _END:
+                # Let sibling workers see the end marker too
+                self._put(in_queue, _END)
+                break
+
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                print(f"Error in pipeline stage {stage.name}: {e}")
+                continue
+
+            outputs = result if stage.flat_map else [result]
+            for output in outputs:
+                if output is not None and not self._put(out_queue, output):
+                    return
+
+        # The last worker to finish closes the stream for the next stage
+        with state["lock"]:
+            state["remaining"] -= 1
+            last = state["remaining"] == 0
+        if last:
+            self._put(out_queue, _END)
+
+    def run(self) -> Iterator[Any]:
+        """
+        Starts the pipeline and yields the outputs of the last stage as they are produced.
+
+        Stopping iteration early (or an exception in the consumer) shuts the pipeline down.
+
+        Yields:
+            Any: The outputs of the last stage.
+        """
+        self._stop.clear()
+        in_queue: queue.Queue = queue.Queue(maxsize=self.source_queue_size)
+        threads = [
+            threading.Thread(
+                target=self._feed_source, args=(in_queue,), name="source", daemon=True
+            )
+        ]
+
+        for stage in self.stages:
+            out_queue: queue.Queue = queue.Queue(maxsize=stage.queue_size)
+            state = {"lock": threading.Lock(), "remaining": stage.workers}
+            for i in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._run_stage,
+                        args=(stage, in_queue, out_queue, state),
+                        name=f"{stage.name}-{i}",
+                        daemon=True,
+                    )
+                )
+            in_queue = out_queue
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(in_queue)
+                if item is _END:
+                    break
+                yield item
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def stop(self) -> None:
+        """
+        Asks all stage threads to stop. Items already being processed are finished first.
+        """
+        self._stop.set()
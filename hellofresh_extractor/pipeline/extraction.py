@@ -0,0 +1,157 @@
+import os
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Type
+import pandas as pd
+from pydantic import BaseModel
+from hellofresh_extractor.gsuite.drive.GoogleDriveHelper import GoogleDriveHelper
+from hellofresh_extractor.imaging.ImageDecoder import register_heif, decode_image
+from hellofresh_extractor.llm.output_schemas import ExtractedMeal
+from hellofresh_extractor.llm.prompts import (
+    multimodal_system_prompt,
+    multimodal_user_query,
+)
+from hellofresh_extractor.llm.utils import convert_structured_result_to_df
+from hellofresh_extractor.pipeline.ResultSink import ResultSink
+from hellofresh_extractor.pipeline.StreamingPipeline import Stage, StreamingPipeline
+
+
+def run_drive_extraction_pipeline(
+    drive_helper: GoogleDriveHelper,
+    folder_id: str,
+    caller: Any,
+    download_path: str = "./downloads",
+    extension: str = "HEIC",
+    output_csv: Optional[str] = None,
+    sink: Optional[ResultSink] = None,
+    upload_folder_id: Optional[str] = None,
+    system_message: str = multimodal_system_prompt,
+    user_query: str = multimodal_user_query,
+    output_schema: Type[BaseModel] = ExtractedMeal,
+    max_image_size: Optional[int] = None,
+    in_memory: bool = False,
+    download_workers: int = 4,
+    decode_workers: int = 4,
+    extract_workers: int = 8,
+    queue_size: int = 8,
+) -> Optional[pd.DataFrame]:
+    """
+    Lists, downloads, decodes and extracts recipe cards from a Google Drive folder as a stream,
+    so extraction starts as soon as the first card is downloaded.
+
+    Stages: list -> download -> decode -> extract -> tabulate -> sink. Each stage has its own
+    worker count and at most queue_size items wait between stages, so memory use is bounded by
+    the queue sizes rather than the folder size.
+
+    Example usage:
+    all_meals = run_drive_extraction_pipeline(
+        drive_helper=drive_helper,
+        folder_id=image_folder_id,
+        caller=gemini_caller,
+        download_path=images_path,
+        output_csv="test_hello_fresh_recipes_gemini.csv",
+        upload_folder_id=top_level_drive_folder_id,
+    )
+
+    Args:
+        drive_helper (GoogleDriveHelper): Helper used to list and download the files.
+        folder_id (str): The ID of the Google Drive folder holding the images.
+        caller (Any): A structured caller with an invoke method, e.g. StructuredGeminiCaller.
+        download_path (str, optional): Directory to save downloaded files. Defaults to "./downloads".
+        extension (str, optional): The image file extension to match. Defaults to "HEIC".
+        output_csv (Optional[str]): If set, the results are written to this CSV file.
+        sink (Optional[ResultSink]): If set, results are streamed to this sink as they are produced
+            instead of being collected in memory.
+        upload_folder_id (Optional[str]): If set together with output_csv or sink, the output file
+            is uploaded to this folder.
+        system_message (str, optional): The system message for the caller.
+        user_query (str, optional): The user query sent with each image.
+        output_schema (Type[BaseModel], optional): The structured output schema. Defaults to ExtractedMeal.
+        max_image_size (Optional[int]): If set, images are downscaled at decode time to this longest side.
+        in_memory (bool, optional): If True, files are downloaded into memory and decoded from there
+            instead of being written to download_path. Defaults to False.
+        download_workers (int, optional): Number of download threads. Defaults to 4.
+        decode_workers (int, optional): Number of decoding processes. Defaults to 4.
+        extract_workers (int, optional): Number of concurrent extraction requests. Defaults to 8.
+        queue_size (int, optional): Maximum number of items waiting between stages. Defaults to 8.
+
+    Returns:
+        Optional[pd.DataFrame]: One row per extracted ingredient, with the source image path.
+            None if a sink is given.
+    """
+    if not in_memory:
+        os.makedirs(download_path, exist_ok=True)
+
+    def download(file_info: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        if in_memory:
+            buffer = BytesIO()
+            if not drive_helper.download_to_stream(file_info, buffer):
+                return None
+            return {"file": file_info, "path": file_info["name"], "data": buffer.getvalue()}
+
+        file_path = drive_helper.download_file(file_info, download_path)
+        if file_path is None:
+            return None
+        return {"file": file_info, "path": file_path}
+
+    def decode(record: Dict[str, Any]) -> Dict[str, Any]:
+        source = record.pop("data", record["path"])
+        record["image"] = decoder_pool.submit(
+            decode_image, source, max_image_size
+        ).result()
+        return record
+
+    def extract(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        result = caller.invoke(
+            system_message=system_message,
+            input_content=[record.pop("image"), user_query],
+            output_schema=output_schema,
+        )
+        if "structured_data" not in result:
+            print(f"Structured data field not found for {record['path']}")
+            return None
+        record["structured_data"] = result["structured_data"]
+        return record
+
+    def tabulate(record: Dict[str, Any]) -> pd.DataFrame:
+        df = convert_structured_result_to_df(record["structured_data"])
+        df["image_path"] = record["path"]
+        return df
+
+    with ProcessPoolExecutor(
+        max_workers=decode_workers, initializer=register_heif
+    ) as decoder_pool:
+        pipeline = StreamingPipeline(
+            source=drive_helper.iter_image_files(folder_id, extension),
+            stages=[
+                Stage("download", download, download_workers, queue_size),
+                Stage("decode", decode, decode_workers, queue_size),
+                Stage("extract", extract, extract_workers, queue_size),
+                Stage("tabulate", tabulate, 1, queue_size),
+            ],
+            source_queue_size=queue_size,
+        )
+        # Sink
+        if sink is not None:
+            with sink:
+                for df in pipeline.run():
+                    sink.write(df)
+        else:
+            all_meals = list(pipeline.run())
+
+    if sink is not None:
+        print(f"Wrote {sink.rows_written} rows to {sink.path}")
+        if upload_folder_id:
+            sink.upload(drive_helper, parent_folder_id=upload_folder_id)
+        return None
+
+    all_meals = pd.concat(all_meals) if all_meals else pd.DataFrame()
+
+    if output_csv:
+        all_meals.to_csv(output_csv, index=False)
+        if upload_folder_id:
+            drive_helper.upload_csv_file(
+                file_path=output_csv, parent_folder_id=upload_folder_id
+            )
+
+    return all_meals
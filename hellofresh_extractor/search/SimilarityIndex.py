@@ -0,0 +1,337 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+class SimilarityIndex:
+    """
+    A cosine similarity index over embedding vectors, e.g. from GeminiEmbeddings.embed_array.
+
+    In "exact" mode every query is scored against every vector with batched matrix products.
+    In "ivf" mode the vectors are clustered with k-means into n_lists inverted lists and each
+    query only scores the vectors in its n_probe closest lists, which trades a little recall
+    for much faster queries on large corpora.
+
+    Example usage:
+    index = SimilarityIndex(dim=matrix.shape[1], mode="ivf")
+    index.add(matrix, ids=meal_ids)
+    ids, scores = index.search(query_matrix, k=5)
+    index.save("recipe_index")
+
+    Attributes:
+        dim (int): The dimension of the vectors.
+        mode (str): Either "exact" or "ivf".
+        n_lists (int): The number of k-means clusters used in "ivf" mode.
+        n_probe (int): The number of clusters searched per query in "ivf" mode.
+        ids (List[Any]): The id of each stored vector, in insertion order.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        mode: str = "exact",
+        n_lists: int = 256,
+        n_probe: int = 8,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initializes an empty index.
+
+        Args:
+            dim (int): The dimension of the vectors.
+            mode (str, optional): Either "exact" or "ivf". Defaults to "exact".
+            n_lists (int, optional): The number of k-means clusters for "ivf" mode. Defaults to 256.
+            n_probe (int, optional): The number of clusters searched per query in "ivf" mode. Defaults to 8.
+            seed (int, optional): Random seed for k-means training. Defaults to 0.
+        """
+        if mode not in ("exact", "ivf"):
+            raise NotImplementedError("Only supports mode='exact' or mode='ivf'")
+
+        self.dim = dim
+        self.mode = mode
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.ids: List[Any] = []
+
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """
+        The normalized stored vectors, one row per id.
+        """
+        if self._pending:
+            self._vectors = np.concatenate([self._vectors, *self._pending])
+            self._pending = []
+        return self._vectors
+
+    def add(self, vectors: np.ndarray, ids: Optional[Sequence[Any]] = None) -> None:
+        """
+        Adds vectors to the index. In "ivf" mode, vectors added after training are assigned
+        to their nearest cluster straight away.
+
+        Args:
+            vectors (np.ndarray): The vectors to add, shape (n, dim).
+            ids (Optional[Sequence[Any]]): An id for each vector. Defaults to consecutive integers.
+        """
+        vectors = self._normalize(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+        if ids is None:
+            ids = range(len(self.ids), len(self.ids) + len(vectors))
+        ids = list(ids)
+        if len(ids) != len(vectors):
+            raise ValueError("The number of ids must match the number of vectors")
+
+        self._pending.append(vectors)
+        self.ids.extend(ids)
+
+        if self._centroids is not None:
+            self._assignments = np.concatenate(
+                [self._assignments, self._nearest_centroids(vectors, 1)[:, 0]]
+            )
+            self._lists = None
+
+    def train(self, n_iter: int = 20, sample_size: int = 50000) -> None:
+        """
+        Clusters the stored vectors with spherical k-means for "ivf" mode. This is called
+        automatically on the first search if needed; call it again after adding many vectors.
+
+        Args:
+            n_iter (int, optional): The number of k-means iterations. Defaults to 20.
+            sample_size (int, optional): Maximum number of vectors used to fit the centroids. Defaults to 50000.
+        """
+        vectors = self.vectors
+        n_lists = min(self.n_lists, len(vectors))
+        if n_lists == 0:
+            return
+
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if len(vectors) > sample_size:
+            sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(n_lists):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+            centroids = self._normalize(centroids)
+
+        self._centroids = centroids
+        self._assignments = np.concatenate(
+            [
+                self._nearest_centroids(vectors[start : start + 4096], 1)[:, 0]
+                for start in range(0, len(vectors), 4096)
+            ]
+        )
+        self._lists = None
+
+    def _nearest_centroids(self, vectors: np.ndarray, n: int) -> np.ndarray:
+        scores = vectors @ self._centroids.T
+        n = min(n, scores.shape[1])
+        nearest = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        return nearest.astype(np.int32)
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            order = np.argsort(self._assignments, kind="stable")
+            bounds = np.searchsorted(
+                self._assignments[order], np.arange(len(self._centroids) + 1)
+            )
+            self._lists = [
+                order[bounds[i] : bounds[i + 1]] for i in range(len(self._centroids))
+            ]
+        return self._lists
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, scores.shape[-1])
+        if k == 0:
+            return (
+                np.empty(scores.shape[:-1] + (0,), dtype=np.int64),
+                np.empty(scores.shape[:-1] + (0,), dtype=np.float32),
+            )
+        top = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        top_scores = np.take_along_axis(scores, top, axis=-1)
+        order = np.argsort(-top_scores, axis=-1)
+        return (
+            np.take_along_axis(top, order, axis=-1),
+            np.take_along_axis(top_scores, order, axis=-1),
+        )
+
+    def search_rows(
+        self, queries: np.ndarray, k: int = 10, batch_size: int = 256
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the k most similar stored vectors for each query, returning row positions.
+
+        Args:
+            queries (np.ndarray): The query vectors, shape (n_queries, dim) or (dim,).
+            k (int, optional): The number of neighbours to return. Defaults to 10.
+            batch_size (int, optional): The number of queries scored at once. Defaults to 256.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The row positions and cosine similarities of the
+                neighbours, each of shape (n_queries, k), best first. In "ivf" mode rows that could
+                not be filled are -1 with a similarity of -inf.
+        """
+        queries = self._normalize(queries)
+        vectors = self.vectors
+        k = min(k, len(vectors))
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        if k == 0:
+            return rows, scores
+
+        if self.mode == "ivf" and self._centroids is None:
+            self.train()
+
+        for start in range(0, len(queries), batch_size):
+            batch = queries[start : start + batch_size]
+            if self.mode == "exact":
+                batch_rows, batch_scores = self._top_k(batch @ vectors.T, k)
+                rows[start : start + len(batch)] = batch_rows
+                scores[start : start + len(batch)] = batch_scores
+                continue
+
+            lists = self._inverted_lists()
+            probes = self._nearest_centroids(batch, self.n_probe)
+            for i, probe in enumerate(probes):
+                candidates = np.concatenate([lists[cluster] for cluster in probe])
+                if len(candidates) == 0:
+                    continue
+                top, top_scores = self._top_k(vectors[candidates] @ batch[i], k)
+                rows[start + i, : len(top)] = candidates[top]
+                scores[start + i, : len(top)] = top_scores
+
+        return rows, scores
+
+    def search(
+        self, queries: np.ndarray, k: int = 10, batch_size: int = 256
+    ) -> Tuple[List[List[Any]], List[np.ndarray]]:
+        """
+        Finds the k most similar stored vectors for each query.
+
+        Args:
+            queries (np.ndarray): The query vectors, shape (n_queries, dim) or (dim,).
+            k (int, optional): The number of neighbours to return. Defaults to 10.
+            batch_size (int, optional): The number of queries scored at once. Defaults to 256.
+
+        Returns:
+            Tuple[List[List[Any]], List[np.ndarray]]: The ids and cosine similarities of the
+                neighbours of each query, best first. In "ivf" mode a query can have fewer than k
+                neighbours; its ids and similarities always have the same length.
+        """
+        rows, scores = self.search_rows(queries, k, batch_size)
+        # Unfilled rows are -1 and sorted last, so only a tail is ever dropped
+        found = (rows >= 0).sum(axis=1)
+        ids = [
+            [self.ids[row] for row in query_rows[:n]] for query_rows, n in zip(rows, found)
+        ]
+        return ids, [query_scores[:n] for query_scores, n in zip(scores, found)]
+
+    def near_duplicates(
+        self, threshold: float = 0.95, k: int = 10, batch_size: int = 256
+    ) -> List[Tuple[Any, Any, float]]:
+        """
+        Finds pairs of stored vectors whose cosine similarity is at least threshold.
+
+        A pair is found if either vector is among the other's k nearest neighbours, which in
+        "ivf" mode need not hold both ways.
+
+        Args:
+            threshold (float, optional): The minimum similarity of a pair. Defaults to 0.95.
+            k (int, optional): The number of neighbours checked per vector. Defaults to 10.
+            batch_size (int, optional): The number of vectors scored at once. Defaults to 256.
+
+        Returns:
+            List[Tuple[Any, Any, float]]: (id_a, id_b, similarity) for each pair, listed once.
+        """
+        rows, scores = self.search_rows(self.vectors, k + 1, batch_size)
+        pairs: Dict[Tuple[int, int], float] = {}
+        for row, (neighbours, similarities) in enumerate(zip(rows, scores)):
+            for neighbour, similarity in zip(neighbours, similarities):
+                if neighbour >= 0 and neighbour != row and similarity >= threshold:
+                    pair = (min(row, neighbour), max(row, neighbour))
+                    pairs[pair] = max(pairs.get(pair, -np.inf), float(similarity))
+        return [
+            (self.ids[a], self.ids[b], similarity)
+            for (a, b), similarity in sorted(pairs.items())
+        ]
+
+    def save(self, directory: str) -> None:
+        """
+        Saves the index to a directory. The ids must be JSON serializable.
+
+        Args:
+            directory (str): The directory to write to. It is created if needed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "vectors.npy"), self.vectors)
+        if self._centroids is not None:
+            np.save(os.path.join(directory, "centroids.npy"), self._centroids)
+            np.save(os.path.join(directory, "assignments.npy"), self._assignments)
+
+        metadata: Dict[str, Any] = {
+            "dim": self.dim,
+            "mode": self.mode,
+            "n_lists": self.n_lists,
+            "n_probe": self.n_probe,
+            "seed": self.seed,
+            "ids": self.ids,
+        }
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump(metadata, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "SimilarityIndex":
+        """
+        Loads an index saved with save.
+
+        Args:
+            directory (str): The directory to read from.
+            mmap (bool, optional): If True, the vectors are memory-mapped rather than read into memory.
+                Defaults to True.
+
+        Returns:
+            SimilarityIndex: The loaded index.
+        """
+        with open(os.path.join(directory, "index.json")) as f:
+            metadata = json.load(f)
+
+        index = cls(
+            dim=metadata["dim"],
+            mode=metadata["mode"],
+            n_lists=metadata["n_lists"],
+            n_probe=metadata["n_probe"],
+            seed=metadata["seed"],
+        )
+        index.ids = metadata["ids"]
+        mmap_mode = "r" if mmap else None
+        index._vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mmap_mode)
+
+        centroids_path = os.path.join(directory, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index._centroids = np.load(centroids_path)
+            index._assignments = np.load(os.path.join(directory, "assignments.npy"))
+        return index
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+# Stops the worker thread
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects requests arriving from many threads into small batches for one worker thread.
+
+    The worker takes the first waiting request, then keeps collecting until it has
+    max_batch_size requests or max_wait_seconds have passed, and hands the batch to
+    handle_batch. Under light load a request waits at most max_wait_seconds; under heavy load
+    batches fill up immediately.
+
+    Example usage:
+    batcher = MicroBatcher(lambda texts: model.invoke_batch(texts), max_batch_size=8)
+    result = batcher.submit(text).result()
+
+    Attributes:
+        handle_batch (Callable[[List[Any]], List[Any]]): Maps a list of requests to a list of
+            results, in the same order. A result that is an Exception fails only its own request.
+        max_batch_size (int): The maximum number of requests per batch.
+        max_wait_seconds (float): How long to wait for a batch to fill up.
+        lock (Optional[threading.Lock]): If set, held while a batch runs, so batchers sharing it
+            never run at the same time.
+    """
+
+    def __init__(
+        self,
+        handle_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_seconds: float = 0.02,
+        lock: Optional[threading.Lock] = None,
+        name: str = "micro-batcher",
+    ) -> None:
+        self.handle_batch = handle_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.lock = lock
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, request: Any) -> Future:
+        """
+        Queues a request.
+
+        Args:
+            request (Any): The request, as expected by handle_batch.
+
+        Returns:
+            Future: Resolves to the result for this request, or to the error raised by handle_batch.
+        """
+        future: Future = Future()
+        self._queue.put((request, future))
+        return future
+
+    def _collect(self, first: Any) -> List[Any]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Put it back so the loop stops after this batch
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = self._collect(item)
+            requests = [request for request, _ in batch]
+            try:
+                if self.lock is not None:
+                    with self.lock:
+                        results = self.handle_batch(requests)
+                else:
+                    results = self.handle_batch(requests)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            if len(results) != len(batch):
+                error = RuntimeError(
+                    f"Batch handler returned {len(results)} results for {len(batch)} requests"
+                )
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def close(self) -> None:
+        """
+        Stops the worker thread once the requests already queued have been handled.
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
@@ -0,0 +1,88 @@
+import http.client
+import json
+import socket
+from typing import Any, Dict, Optional
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ModelClient:
+    """
+    Sends requests to a ModelServer over its Unix socket or localhost HTTP.
+
+    Every request opens its own connection, so one client can be shared between threads.
+
+    Example usage:
+    client = ModelClient(socket_path="/tmp/hellofresh_extractor.sock")
+    print(client.health())
+
+    Attributes:
+        socket_path (Optional[str]): The server's Unix socket.
+        host (str): The server's host, if socket_path is None.
+        port (int): The server's port, if socket_path is None.
+        timeout (float): Seconds to wait for a response.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        timeout: float = 600,
+    ) -> None:
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.socket_path:
+            return _UnixHTTPConnection(self.socket_path, self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, payload: Any = None) -> Dict[str, Any]:
+        connection = self._connect()
+        try:
+            body = None if payload is None else json.dumps(payload)
+            connection.request(
+                method, path, body=body, headers={"Content-Type": "application/json"}
+            )
+            response = connection.getresponse()
+            data = json.loads(response.read())
+        finally:
+            connection.close()
+
+        if response.status != 200:
+            raise RuntimeError(f"Model server error on {path}: {data.get('error')}")
+        return data
+
+    def post(self, path: str, payload: Dict[str, Any]) -> Any:
+        """
+        Sends a request to a served model.
+
+        Args:
+            path (str): The model's path, e.g. "/multimodal".
+            payload (Dict[str, Any]): The JSON-serializable request.
+
+        Returns:
+            Any: The model's result.
+
+        Raises:
+            RuntimeError: If the server could not handle the request.
+        """
+        return self._request("POST", path, payload)["result"]
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Returns the server's status and the models it serves.
+        """
+        return self._request("GET", "/health")
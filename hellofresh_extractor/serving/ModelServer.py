@@ -0,0 +1,299 @@
+import json
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from PIL import Image
+from hellofresh_extractor.serving.MicroBatcher import MicroBatcher
+from hellofresh_extractor.serving.serialization import decode_user_messages
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Unix sockets refuse connections once the backlog is full instead of retrying
+    request_queue_size = 128
+
+
+class _TCPHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, self.server.model_server.health())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self) -> None:
+        batcher = self.server.model_server.batchers.get(self.path.strip("/"))
+        if batcher is None:
+            self._send_json(404, {"error": f"No model is served at {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            result = batcher.submit(request).result()
+            self._send_json(200, {"result": result})
+        except Exception as e:
+            print(f"Error handling request to {self.path}: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Unix socket peers have no address, and per-request logs would drown the output
+        pass
+
+
+class ModelServer:
+    """
+    Hosts a MultiModalModel and/or a StructuredOutputModel in one long-lived process, so that
+    notebook kernels and batch jobs share one warm copy of each model instead of loading their own.
+
+    The server listens on a Unix socket, or on localhost HTTP if no socket path is given.
+    Concurrent requests to each model are grouped into micro-batches and run with the model's
+    invoke_batch. Only one batch runs at a time, so the models do not compete for the CPU.
+    Use RemoteMultiModalModel and RemoteStructuredOutputModel as clients.
+
+    Example usage:
+    server = ModelServer(
+        multimodal_model=multimodal_model_caller,
+        structured_model=structured_model_caller,
+        socket_path="/tmp/hellofresh_extractor.sock",
+    )
+    server.serve_forever()
+
+    Attributes:
+        multimodal_model (Optional[MultiModalModel]): Served at /multimodal.
+        structured_model (Optional[StructuredOutputModel]): Served at /structured.
+        socket_path (Optional[str]): The Unix socket to listen on.
+        host (str): The host to listen on if socket_path is None.
+        port (int): The port to listen on if socket_path is None.
+        batchers (Dict[str, MicroBatcher]): The micro-batcher of each served model.
+    """
+
+    def __init__(
+        self,
+        multimodal_model: Any = None,
+        structured_model: Any = None,
+        socket_path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        max_batch_size: int = 4,
+        max_wait_seconds: float = 0.05,
+        max_batch_tokens: Optional[int] = None,
+        warmup: bool = True,
+    ) -> None:
+        """
+        Initializes the server. Nothing listens until serve_forever or start is called.
+
+        Args:
+            multimodal_model (Any, optional): The MultiModalModel to serve. Defaults to None.
+            structured_model (Any, optional): The StructuredOutputModel to serve. Defaults to None.
+            socket_path (Optional[str]): The Unix socket to listen on. Defaults to None (use host and port).
+            host (str, optional): The host to listen on. Defaults to "127.0.0.1".
+            port (int, optional): The port to listen on. Defaults to 8765.
+            max_batch_size (int, optional): The maximum number of requests per batch. Defaults to 4.
+            max_wait_seconds (float, optional): How long to wait for a batch to fill up. Defaults to 0.05.
+            max_batch_tokens (Optional[int]): Memory budget per multimodal batch, see
+                MultiModalModel.invoke_batch. Defaults to None.
+            warmup (bool, optional): If True, run each model once before accepting requests. Defaults to True.
+        """
+        if multimodal_model is None and structured_model is None:
+            raise ValueError("At least one model must be served")
+
+        self.multimodal_model = multimodal_model
+        self.structured_model = structured_model
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.max_batch_tokens = max_batch_tokens
+        self.warmup = warmup
+        self._httpd: Any = None
+        self._thread: Optional[threading.Thread] = None
+
+        model_lock = threading.Lock()
+        self.batchers: Dict[str, MicroBatcher] = {}
+        if multimodal_model is not None:
+            self.batchers["multimodal"] = MicroBatcher(
+                self._handle_multimodal_batch,
+                max_batch_size,
+                max_wait_seconds,
+                lock=model_lock,
+                name="multimodal-batcher",
+            )
+        if structured_model is not None:
+            self.batchers["structured"] = MicroBatcher(
+                self._handle_structured_batch,
+                max_batch_size,
+                max_wait_seconds,
+                lock=model_lock,
+                name="structured-batcher",
+            )
+
+    def _handle_multimodal_batch(self, requests: List[Dict[str, Any]]) -> List[Any]:
+        # Requests can only share a batch if they use the same generation settings
+        groups: Dict[tuple, List[int]] = {}
+        for i, request in enumerate(requests):
+            key = (request.get("max_tokens", 1000), request.get("temperature", 0.1))
+            groups.setdefault(key, []).append(i)
+
+        results: List[Any] = [None] * len(requests)
+        for (max_tokens, temperature), indices in groups.items():
+            outputs = self.multimodal_model.invoke_batch(
+                [
+                    (
+                        requests[i]["system_message"],
+                        decode_user_messages(requests[i]["user_messages"]),
+                    )
+                    for i in indices
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                batch_size=len(indices),
+                max_batch_tokens=self.max_batch_tokens,
+            )
+            # Pipeline records also carry input_text, the chat messages including any PIL
+            # images, which cannot be serialized. Clients only need the generated text.
+            for i, output in zip(indices, outputs):
+                results[i] = [
+                    {"generated_text": record["generated_text"]} for record in output
+                ]
+        return results
+
+    def _handle_structured_batch(self, requests: List[Dict[str, Any]]) -> List[Any]:
+        # invoke_batch shares the system message and query between all items
+        groups: Dict[tuple, List[int]] = {}
+        for i, request in enumerate(requests):
+            key = (request["system_message"], request["user_query"])
+            groups.setdefault(key, []).append(i)
+
+        results: List[Any] = [None] * len(requests)
+        for (system_message, user_query), indices in groups.items():
+            outputs = self.structured_model.invoke_batch(
+                system_message,
+                user_query,
+                [requests[i]["text_to_extract"] for i in indices],
+                batch_size=len(indices),
+            )
+            # invoke_batch returns None for failed items, where a local invoke would raise, so
+            # those requests are answered with an error
+            for i, output in zip(indices, outputs):
+                if output is None:
+                    results[i] = RuntimeError("Structured output generation failed")
+                elif hasattr(output, "model_dump"):
+                    results[i] = output.model_dump()
+                else:
+                    results[i] = output
+        return results
+
+    def _warmup(self) -> None:
+        """
+        Runs a tiny request through each model, so that lazy initialization and the first,
+        slowest forward pass happen before any client is waiting.
+        """
+        if self.multimodal_model is not None:
+            print("Warming up multimodal model")
+            try:
+                self.multimodal_model.invoke(
+                    system_message="Describe the image.",
+                    user_messages=[
+                        {"type": "image", "image": Image.new("RGB", (64, 64), "white")},
+                        {"type": "text", "text": "What is in the image?"},
+                    ],
+                    max_tokens=1,
+                )
+            except Exception as e:
+                print(f"Error warming up multimodal model: {e}")
+
+        if self.structured_model is not None:
+            print("Warming up structured output model")
+            try:
+                self.structured_model.invoke_batch(
+                    "Extract the recipe.", "Extract the recipe.", ["Warm-up"]
+                )
+            except Exception as e:
+                print(f"Error warming up structured output model: {e}")
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Returns the status of the server, the models it serves and the (width, height) the
+        multimodal model resizes images to, so clients can downscale before sending.
+        """
+        image_size = None
+        if self.multimodal_model is not None:
+            image_size = getattr(self.multimodal_model, "image_size", None)
+        return {
+            "status": "ok",
+            "models": sorted(self.batchers),
+            "image_size": list(image_size) if image_size else None,
+        }
+
+    def _bind(self) -> None:
+        if self.socket_path:
+            # A socket file left behind by a previous server would make the bind fail
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self._httpd = _UnixHTTPServer(self.socket_path, _RequestHandler)
+            address = self.socket_path
+        else:
+            self._httpd = _TCPHTTPServer((self.host, self.port), _RequestHandler)
+            address = f"http://{self.host}:{self.port}"
+        self._httpd.model_server = self
+        print(f"Model server listening on {address}")
+
+    def serve_forever(self) -> None:
+        """
+        Warms up the models and serves requests until shutdown is called or the process is interrupted.
+        """
+        if self.warmup:
+            self._warmup()
+        self._bind()
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._close()
+
+    def start(self) -> None:
+        """
+        Warms up the models and serves requests from a background thread, e.g. inside a notebook.
+        """
+        if self.warmup:
+            self._warmup()
+        self._bind()
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="model-server", daemon=True
+        )
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """
+        Stops a server started with start, or from another thread, one started with serve_forever.
+        """
+        if self._httpd is not None:
+            self._httpd.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._close()
+
+    def _close(self) -> None:
+        if self._httpd is not None:
+            self._httpd.server_close()
+            self._httpd = None
+        for batcher in self.batchers.values():
+            batcher.close()
+        self.batchers = {}
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
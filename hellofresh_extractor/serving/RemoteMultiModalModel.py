@@ -0,0 +1,41 @@
+from hellofresh_extractor.serving.ModelClient import ModelClient
+from hellofresh_extractor.serving.serialization import encode_user_messages
+
+
+class RemoteMultiModalModel:
+    """
+    A drop-in replacement for MultiModalModel that sends requests to a ModelServer.
+
+    In-memory images are downscaled to the size the server reports before they are sent.
+
+    Example usage:
+    multimodal_model_caller = RemoteMultiModalModel(ModelClient(socket_path="/tmp/hellofresh_extractor.sock"))
+    multimodal_result = multimodal_model_caller.invoke(
+        system_message=multimodal_system_prompt, user_messages=user_message
+    )
+    """
+
+    def __init__(self, client: ModelClient):
+        self.client = client
+        self._image_size = None
+        self._image_size_known = False
+
+    def _server_image_size(self):
+        # Asked once, the served model does not change while the server runs
+        if not self._image_size_known:
+            self._image_size = self.client.health().get("image_size")
+            self._image_size_known = True
+        return self._image_size
+
+    def invoke(self, system_message, user_messages, max_tokens=1000, temperature=0.1):
+        return self.client.post(
+            "/multimodal",
+            {
+                "system_message": system_message,
+                "user_messages": encode_user_messages(
+                    user_messages, self._server_image_size()
+                ),
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            },
+        )
@@ -0,0 +1,30 @@
+from hellofresh_extractor.serving.ModelClient import ModelClient
+
+
+class RemoteStructuredOutputModel:
+    """
+    A drop-in replacement for StructuredOutputModel that sends requests to a ModelServer.
+
+    Results are validated into outputmodel on the client side. Like the local invoke, a
+    failed generation raises, here as a RuntimeError carrying the server's error message.
+
+    Example usage:
+    structured_model_caller = RemoteStructuredOutputModel(
+        ModelClient(socket_path="/tmp/hellofresh_extractor.sock"), outputmodel=ExtractedMeal
+    )
+    """
+
+    def __init__(self, client: ModelClient, outputmodel):
+        self.client = client
+        self.output_model = outputmodel
+
+    def invoke(self, system_message, user_query, text_to_extract):
+        result = self.client.post(
+            "/structured",
+            {
+                "system_message": system_message,
+                "user_query": user_query,
+                "text_to_extract": text_to_extract,
+            },
+        )
+        return self.output_model.model_validate(result)
@@ -0,0 +1,99 @@
+import base64
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from PIL import Image
+from hellofresh_extractor.llm.EncodedImage import EncodedImage
+
+
+def encode_image(
+    image: Any, image_size: Optional[Sequence[int]] = None
+) -> Dict[str, Any]:
+    """
+    Encodes an in-memory image for the model server as base64 PNG.
+
+    Raw pixels of a 12 MP photo are ~36 MB, which makes sending and parsing the JSON slower
+    than the request itself. If the server reports the size it resizes images to, the image is
+    first downscaled so that it still covers that size, since the extra pixels would be thrown
+    away by the server anyway.
+
+    Args:
+        image (Any): A PIL image or a uint8 array.
+        image_size (Optional[Sequence[int]]): The (width, height) the server resizes images to.
+            Defaults to None (send the full resolution).
+
+    Returns:
+        Dict[str, Any]: The JSON-serializable image.
+    """
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    if image_size:
+        scale = max(image_size[0] / image.width, image_size[1] / image.height)
+        if scale < 1:
+            image = image.resize(
+                (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                Image.Resampling.BILINEAR,
+            )
+
+    return {"format": "png", "data": EncodedImage.from_image(image, "PNG").base64}
+
+
+def decode_image(encoded: Dict[str, Any]) -> Image.Image:
+    """
+    Decodes an image produced by encode_image.
+
+    Args:
+        encoded (Dict[str, Any]): The JSON-serializable image.
+
+    Returns:
+        Image.Image: The PIL image.
+    """
+    image = Image.open(BytesIO(base64.b64decode(encoded["data"])))
+    image.load()
+    return image
+
+
+def encode_user_messages(
+    user_messages: List[Dict[str, Any]], image_size: Optional[Sequence[int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Makes MultiModalModel user messages JSON-serializable. In-memory images are encoded, while
+    paths and URLs are passed as they are.
+
+    Args:
+        user_messages (List[Dict[str, Any]]): The user message content.
+        image_size (Optional[Sequence[int]]): The (width, height) the server resizes images to,
+            see encode_image. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: The encoded user message content.
+    """
+    encoded = []
+    for message in user_messages:
+        image = message.get("image") if message.get("type") == "image" else None
+        if isinstance(image, (Image.Image, np.ndarray)):
+            message = {**message, "image": encode_image(image, image_size)}
+        encoded.append(message)
+    return encoded
+
+
+def decode_user_messages(user_messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reverses encode_user_messages.
+
+    Args:
+        user_messages (List[Dict[str, Any]]): The encoded user message content.
+
+    Returns:
+        List[Dict[str, Any]]: The user message content, with PIL images.
+    """
+    decoded = []
+    for message in user_messages:
+        image = message.get("image") if message.get("type") == "image" else None
+        if isinstance(image, dict):
+            message = {**message, "image": decode_image(image)}
+        decoded.append(message)
+    return decoded
@@ -0,0 +1,35 @@
+from typing import Any, Dict, IO
+from hellofresh_extractor.gsuite.drive.GoogleDriveHelper import GoogleDriveHelper
+
+
+class _FakeDownloadHelper(GoogleDriveHelper):
+    """
+    Serves file contents from memory instead of Google Drive.
+    """
+
+    def __init__(self, contents: Dict[str, bytes]) -> None:
+        self.contents = contents
+
+    def download_to_stream(
+        self, file_info: Dict[str, Any], stream: IO[bytes], *args: Any
+    ) -> bool:
+        stream.write(self.contents[file_info["id"]])
+        return True
+
+
+def test_iter_downloads_in_memory_spills_empty_file():
+    drive_helper = _FakeDownloadHelper({"empty": b"", "card": b"image bytes"})
+    files = [
+        # Drive reported a size above the threshold, but the content is empty
+        {"id": "empty", "name": "empty.HEIC", "size": "100"},
+        {"id": "card", "name": "card.HEIC", "size": "100"},
+    ]
+
+    downloads = [
+        (file_info["id"], bytes(data))
+        for file_info, data in drive_helper.iter_downloads_in_memory(
+            files, spill_threshold=10
+        )
+    ]
+
+    assert downloads == [("empty", b""), ("card", b"image bytes")]
@@ -0,0 +1,109 @@
+import os
+from typing import Any, Dict, List
+from hellofresh_extractor.gsuite.drive.DriveFolderSync import DriveFolderSync
+
+FOLDER_ID = "shared-folder"
+DRIVE_ID = "shared-drive"
+
+
+class _Request:
+    def __init__(self, result: Any) -> None:
+        self.result = result
+
+    def execute(self) -> Any:
+        return self.result
+
+
+class _SharedDriveChanges:
+    """
+    Mimics the Drive Changes API for a shared drive: its changes are only reported when the
+    request names the drive and opts in to shared drive items.
+    """
+
+    def __init__(self, service: "_SharedDriveService") -> None:
+        self.service = service
+
+    def getStartPageToken(self, **kwargs: Any) -> _Request:
+        if kwargs.get("driveId") == DRIVE_ID and kwargs.get("supportsAllDrives"):
+            return _Request({"startPageToken": "drive-token-1"})
+        return _Request({"startPageToken": "user-token-1"})
+
+    def list(self, pageToken: str, **kwargs: Any) -> _Request:
+        shared = (
+            kwargs.get("driveId") == DRIVE_ID
+            and kwargs.get("supportsAllDrives")
+            and kwargs.get("includeItemsFromAllDrives")
+        )
+        if not shared or pageToken != "drive-token-1":
+            return _Request({"changes": [], "newStartPageToken": pageToken})
+        return _Request(
+            {
+                "changes": [
+                    {"fileId": file_info["id"], "removed": False, "file": file_info}
+                    for file_info in self.service.new_files
+                ],
+                "newStartPageToken": "drive-token-2",
+            }
+        )
+
+
+class _SharedDriveFiles:
+    def get(self, fileId: str, **kwargs: Any) -> _Request:
+        assert fileId == FOLDER_ID and kwargs.get("supportsAllDrives")
+        return _Request({"driveId": DRIVE_ID})
+
+
+class _SharedDriveService:
+    def __init__(self) -> None:
+        self.new_files: List[Dict[str, Any]] = []
+
+    def changes(self) -> _SharedDriveChanges:
+        return _SharedDriveChanges(self)
+
+    def files(self) -> _SharedDriveFiles:
+        return _SharedDriveFiles()
+
+
+class _FakeDriveHelper:
+    def __init__(self, listed_files: List[Dict[str, Any]]) -> None:
+        self.drive_service = _SharedDriveService()
+        self.listed_files = listed_files
+
+    def list_image_files(
+        self, folder_id: str, extension: str, file_fields: str
+    ) -> List[Dict[str, Any]]:
+        return list(self.listed_files)
+
+    def download_file(self, file_info: Dict[str, Any], download_path: str) -> str:
+        file_path = os.path.join(download_path, file_info["name"])
+        with open(file_path, "wb") as f:
+            f.write(b"image")
+        return file_path
+
+
+def card(file_id: str) -> Dict[str, Any]:
+    return {
+        "id": file_id,
+        "name": f"{file_id}.HEIC",
+        "md5Checksum": file_id,
+        "size": "5",
+        "modifiedTime": "2025-01-01T00:00:00Z",
+        "parents": [FOLDER_ID],
+        "trashed": False,
+    }
+
+
+def test_sync_follows_shared_drive_changes(tmp_path):
+    drive_helper = _FakeDriveHelper([card("first")])
+
+    first = DriveFolderSync(drive_helper, FOLDER_ID, download_path=str(tmp_path))
+    assert [f["id"] for f in first.sync(use_changes=True)["added"]] == ["first"]
+    assert first.manifest["start_page_token"] == "drive-token-1"
+
+    drive_helper.drive_service.new_files = [card("second")]
+    second = DriveFolderSync(drive_helper, FOLDER_ID, download_path=str(tmp_path))
+    diff = second.sync(use_changes=True)
+
+    assert [f["id"] for f in diff["added"]] == ["second"]
+    assert second.manifest["start_page_token"] == "drive-token-2"
+    assert second.manifest["drive_id"] == DRIVE_ID
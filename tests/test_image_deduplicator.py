@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from PIL import Image
+from hellofresh_extractor.imaging.ImageDeduplicator import ImageDeduplicator
+
+
+def random_image(seed: int) -> Image.Image:
+    pixels = np.random.default_rng(seed).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+def test_run_skips_undecodable_images():
+    card = random_image(0)
+    other_card = random_image(1)
+
+    results = ImageDeduplicator().run(
+        [
+            ("card.jpg", card),
+            ("corrupt.heic", None),
+            ("retake.jpg", card.copy()),
+            ("other.jpg", other_card),
+        ],
+        lambda image: image.size,
+    )
+
+    assert results == {
+        "card.jpg": (64, 64),
+        "retake.jpg": (64, 64),
+        "other.jpg": (64, 64),
+    }
+
+
+def test_cluster_skips_undecodable_images():
+    card = random_image(0)
+
+    clusters = ImageDeduplicator().cluster([("card.jpg", card), ("corrupt.heic", None)])
+
+    assert clusters == {"card.jpg": ["card.jpg"]}
+
+
+def test_run_on_decoder_output_with_a_corrupt_file(tmp_path):
+    pytest.importorskip("pillow_heif")
+    from hellofresh_extractor.imaging.ImageDecoder import ImageDecoder
+
+    good = tmp_path / "card.png"
+    random_image(0).save(good)
+    bad = tmp_path / "corrupt.heic"
+    bad.write_bytes(b"not an image")
+
+    with ImageDecoder(max_workers=1) as decoder:
+        results = ImageDeduplicator().run(
+            decoder.decode([str(good), str(bad), str(good)]), lambda image: "extracted"
+        )
+
+    assert results == {str(good): "extracted"}